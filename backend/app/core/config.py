@@ -1,11 +1,20 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
 from typing import Optional
 
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
 class Settings(BaseSettings):
+    # Frozen: settings are read-only for the process lifetime
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
+
     FAL_KEY: Optional[str] = None
     
+    # CORS
+    CORS_ALLOW_ORIGINS: str = "*"  # Comma-separated list of allowed origins; "*" allows any (development)
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50  # Shared pool size; callers wait for a free connection beyond this
     
     # Gemini - Image Generation (workflow-based model selection)
     GEMINI_API_KEY: Optional[str] = None
@@ -14,21 +23,31 @@ class Settings(BaseSettings):
     GEMINI_THINKING_LEVEL: Optional[str] = "low"  # Applied to Pro model only
     GEMINI_IMAGE_SIZE: Optional[str] = "1K"  # Image resolution (1K, 2K, 4K for Pro)
     GEMINI_IMAGE_ASPECT_RATIO: Optional[str] = "1:1"  # Aspect ratio for generated images
+    GEMINI_MAX_CONCURRENCY: int = 6  # Max in-flight image requests across the process (covers a full box panel set)
     
     # Artifact Storage
     SAVE_ARTIFACTS_LOCALLY: bool = False  # Save to filesystem for testing/debugging
     
+    # File exports (mesh conversion and rendering run in worker processes)
+    EXPORT_MAX_WORKERS: int = 4  # Capped at the CPU count; 0 runs exports in a thread instead
+    
     # Trellis
     TRELLIS_ENABLE_MULTI_IMAGE: bool = False
     TRELLIS_MULTIIMAGE_ALGO: str = "stochastic"  # stochastic | multidiffusion
+    TRELLIS_POLL_BASE_SECONDS: float = 1.0  # First fal.ai status poll backoff window
+    TRELLIS_POLL_CAP_SECONDS: float = 15.0  # Longest wait between status polls
+    TRELLIS_RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # Reuse results for identical inputs; 0 disables
     
     # Demo Mock Mode - Simulate generation with hardcoded timing (no real API calls)
     DEMO_MOCK_MODE: bool = False  # Enable for presentations - uses pre-seeded data with fake loading
     DEMO_CREATE_DELAY: int = 8    # Seconds to simulate create generation
     DEMO_EDIT_DELAY: int = 6      # Seconds to simulate edit generation
 
-    class Config:
-        env_file = ".env"
-        extra = "ignore"  # Allow extra fields in .env
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build settings once (reads .env + validates) and reuse the instance."""
+    return Settings()
+
+
+settings = get_settings()
@@ -5,11 +5,16 @@ from __future__ import annotations
 import json
 import logging
 import os
+import threading
+from itertools import chain
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 
 import redis
 from redis.exceptions import RedisError
 
-from app.core.config import settings
+from app.core.config import get_settings
+
+settings = get_settings()
 
 # Default to local Redis instance
 _DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
@@ -29,6 +34,22 @@ def get_redis_url() -> str:
 
 logger = logging.getLogger(__name__)
 
+# KEYS: hash, version counter, plain keys to SET. ARGV: flag field, number of
+# hash args, hash field/value pairs, then one value per plain key.
+_CLAIM_HASH_LUA = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == 'true' then
+  return false
+end
+local n = tonumber(ARGV[2])
+if n > 0 then
+  redis.call('HSET', KEYS[1], unpack(ARGV, 3, 2 + n))
+end
+for i = 3, #KEYS do
+  redis.call('SET', KEYS[i], ARGV[n + i])
+end
+return redis.call('INCR', KEYS[2])
+"""
+
 
 class RedisService:
     """Thin Redis client with graceful degradation to an in-memory store."""
@@ -37,11 +58,20 @@ class RedisService:
         self._url = redis_url or _resolve_redis_url()
         self.client = self._create_client(self._url)
         self._fallback_store: dict[str, str] = {}
+        self._fallback_hashes: dict[str, dict[str, str]] = {}
+        self._fallback_lock = threading.Lock()
         self._use_fallback = False
+        self._claim_script = self.client.register_script(_CLAIM_HASH_LUA)
 
     @staticmethod
     def _create_client(redis_url: str) -> redis.Redis:
-        return redis.from_url(redis_url, decode_responses=True)
+        # One bounded, process-wide pool shared by the event loop and worker threads
+        pool = redis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            decode_responses=True,
+        )
+        return redis.Redis(connection_pool=pool)
 
     def get(self, key: str) -> str | None:
         try:
@@ -52,6 +82,16 @@ class RedisService:
             self._use_fallback = True
             return self._fallback_store.get(key)
 
+    def mget(self, keys: Sequence[str]) -> List[str | None]:
+        """Fetch several keys in one round-trip."""
+        try:
+            if self._use_fallback:
+                return [self._fallback_store.get(key) for key in keys]
+            return self.client.mget(keys)
+        except RedisError:
+            self._use_fallback = True
+            return [self._fallback_store.get(key) for key in keys]
+
     def set(self, key: str, value: str, ex: int | None = None) -> bool:
         try:
             if self._use_fallback:
@@ -63,6 +103,117 @@ class RedisService:
             self._fallback_store[key] = value
             return True
 
+    def set_versioned(self, key: str, value: str, version_key: str) -> int:
+        """SET value and INCR its version counter in one MULTI round-trip.
+
+        Returns the new version so callers can tag in-process caches with it.
+        """
+        return self.set_many({key: value}, [version_key])[0]
+
+    def set_many(
+        self,
+        values: Dict[str, str],
+        incr_keys: Sequence[str] = (),
+        hashes: Optional[Mapping[str, Mapping[str, str]]] = None,
+    ) -> List[int]:
+        """SET keys, HSET hash fields and INCR counters in a single MULTI round-trip.
+
+        Returns the new counter values in the order of ``incr_keys``.
+        """
+        hashes = hashes or {}
+        try:
+            if self._use_fallback:
+                return self._fallback_set_many(values, incr_keys, hashes)
+            pipe = self.client.pipeline(transaction=True)
+            for key, value in values.items():
+                pipe.set(key, value)
+            for key, mapping in hashes.items():
+                pipe.hset(key, mapping=mapping)
+            for key in incr_keys:
+                pipe.incr(key)
+            results = pipe.execute()
+            return [int(version) for version in results[len(values) + len(hashes):]]
+        except RedisError:
+            self._use_fallback = True
+            return self._fallback_set_many(values, incr_keys, hashes)
+
+    def _fallback_set_many(
+        self,
+        values: Dict[str, str],
+        incr_keys: Sequence[str],
+        hashes: Mapping[str, Mapping[str, str]],
+    ) -> List[int]:
+        self._fallback_store.update(values)
+        for key, mapping in hashes.items():
+            self._fallback_hashes.setdefault(key, {}).update(mapping)
+        return [self.incr(key) for key in incr_keys]
+
+    def claim_hash(
+        self,
+        key: str,
+        flag_field: str,
+        mapping: Mapping[str, str],
+        version_key: str,
+        values: Optional[Mapping[str, str]] = None,
+    ) -> Optional[int]:
+        """Atomically write a hash unless its ``flag_field`` is already JSON ``true``.
+
+        In one script call: HSET ``mapping``, SET ``values`` and INCR
+        ``version_key``. Returns the new version, or None if the flag was set
+        and nothing was written.
+        """
+        values = values or {}
+        try:
+            if self._use_fallback:
+                return self._fallback_claim_hash(key, flag_field, mapping, version_key, values)
+            args = [flag_field, len(mapping) * 2, *chain.from_iterable(mapping.items()), *values.values()]
+            result = self._claim_script(keys=[key, version_key, *values.keys()], args=args)
+            return None if result is None else int(result)
+        except RedisError:
+            self._use_fallback = True
+            return self._fallback_claim_hash(key, flag_field, mapping, version_key, values)
+
+    def _fallback_claim_hash(
+        self,
+        key: str,
+        flag_field: str,
+        mapping: Mapping[str, str],
+        version_key: str,
+        values: Mapping[str, str],
+    ) -> Optional[int]:
+        with self._fallback_lock:
+            if self._fallback_hashes.get(key, {}).get(flag_field) == "true":
+                return None
+            return self._fallback_set_many(dict(values), [version_key], {key: mapping})[0]
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        try:
+            if self._use_fallback:
+                return dict(self._fallback_hashes.get(key, {}))
+            return self.client.hgetall(key)
+        except RedisError:
+            self._use_fallback = True
+            return dict(self._fallback_hashes.get(key, {}))
+
+    def get_and_hgetall(self, key: str, hash_key: str) -> Tuple[str | None, Dict[str, str]]:
+        """GET one key and HGETALL a hash in a single pipelined round-trip."""
+        try:
+            if self._use_fallback:
+                return self._fallback_store.get(key), dict(self._fallback_hashes.get(hash_key, {}))
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.hgetall(hash_key)
+            raw_value, mapping = pipe.execute()
+            return raw_value, mapping
+        except RedisError:
+            self._use_fallback = True
+            return self._fallback_store.get(key), dict(self._fallback_hashes.get(hash_key, {}))
+
+    def get_version(self, version_key: str) -> int:
+        """Read a version counter written by set_versioned/incr (0 if unset)."""
+        raw_value = self.get(version_key)
+        return int(raw_value) if raw_value else 0
+
     def set_json(self, key: str, value: object, ex: int | None = None) -> bool:
         """Serialize value to JSON before storing."""
         payload = json.dumps(value, ensure_ascii=False)
@@ -82,12 +233,17 @@ class RedisService:
 
     def delete(self, key: str) -> int:
         if self._use_fallback:
-            return 1 if self._fallback_store.pop(key, None) is not None else 0
+            return self._fallback_delete(key)
         try:
             return self.client.delete(key)
         except RedisError:
             self._use_fallback = True
-            return 1 if self._fallback_store.pop(key, None) is not None else 0
+            return self._fallback_delete(key)
+
+    def _fallback_delete(self, key: str) -> int:
+        removed = self._fallback_store.pop(key, None) is not None
+        removed = self._fallback_hashes.pop(key, None) is not None or removed
+        return 1 if removed else 0
 
     def get_json(self, key: str, default: object | None = None) -> object | None:
         """Return JSON-decoded payload with graceful fallback."""
@@ -161,11 +317,13 @@ class RedisService:
         try:
             if self._use_fallback:
                 self._fallback_store.clear()
+                self._fallback_hashes.clear()
                 return True
             return self.client.flushdb()
         except RedisError:
             self._use_fallback = True
             self._fallback_store.clear()
+            self._fallback_hashes.clear()
             return True
 
 
@@ -1,13 +1,14 @@
 """Demo seeding endpoints for pre-loading product and packaging state."""
 
-import json
 import logging
+import os
+import time
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
 
 from app.models.product_state import (
     ProductState,
@@ -28,11 +29,19 @@ from app.models.packaging_state import (
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/demo", tags=["demo"])
 
-FIXTURES_PATH = Path(__file__).parents[3] / "demo_fixtures.json"
+FIXTURES_PATH = Path(__file__).resolve().parents[3] / "demo_fixtures.json"
+_FIXTURES_STR = str(FIXTURES_PATH)
+
+_UTC = timezone.utc
 
 
 def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
+    return datetime.now(_UTC)
+
+
+def _first_three(items: list) -> list:
+    """Return at most three items, reusing the list itself when it is already short enough."""
+    return items[:3] if len(items) > 3 else items
 
 
 class SeedProductRequest(BaseModel):
@@ -50,6 +59,46 @@ class SeedPackagingRequest(BaseModel):
     panel_textures: dict[str, dict] = {}  # panel_id -> {texture_url, prompt}
 
 
+class FixturesFile(BaseModel):
+    """Shape of demo_fixtures.json; unknown keys (comments, trellis inputs) are ignored.
+
+    Each section is validated on its own: an incomplete one is logged and
+    left as None so it gets skipped, without failing the rest of the file.
+    """
+    product: Optional[SeedProductRequest] = None
+    product_create: Optional[SeedProductRequest] = None
+    packaging: Optional[SeedPackagingRequest] = None
+    packaging_fixtures: Optional[SeedPackagingRequest] = None
+
+    @field_validator("*", mode="wrap")
+    @classmethod
+    def _skip_invalid_section(cls, value, handler, info):
+        try:
+            return handler(value)
+        except ValidationError as e:
+            logger.warning(f"[demo] Ignoring invalid fixtures section '{info.field_name}': {e}")
+            return None
+
+
+_PANEL_TEXTURES_ADAPTER = TypeAdapter(dict[str, PanelTexture])
+
+# Validated fixtures keyed by (st_mtime_ns, st_size) so unchanged files aren't re-parsed
+_fixtures_cache: Optional[Tuple[Tuple[int, int], FixturesFile]] = None
+
+
+def _load_fixtures() -> FixturesFile:
+    """Parse and validate the fixtures file in one pass, reusing it while unchanged."""
+    global _fixtures_cache
+    st = os.stat(_FIXTURES_STR)
+    cache_key = (st.st_mtime_ns, st.st_size)
+    if _fixtures_cache is not None and _fixtures_cache[0] == cache_key:
+        return _fixtures_cache[1]
+
+    fixtures = FixturesFile.model_validate_json(FIXTURES_PATH.read_bytes())
+    _fixtures_cache = (cache_key, fixtures)
+    return fixtures
+
+
 @router.post("/seed-product")
 async def seed_product(request: SeedProductRequest):
     """
@@ -65,7 +114,7 @@ async def seed_product(request: SeedProductRequest):
     
     # Create pre-loaded state
     iteration = ProductIteration(
-        id=f"demo_{int(_utcnow().timestamp())}",
+        id=f"demo_{int(time.time())}",
         type="create",
         prompt=request.prompt,
         images=request.preview_images,
@@ -134,15 +183,17 @@ async def seed_packaging(request: SeedPackagingRequest):
     else:
         state.cylinder_state.dimensions = request.dimensions
     
-    # Add panel textures
-    for panel_id, texture_data in request.panel_textures.items():
-        texture = PanelTexture(
-            panel_id=panel_id,
-            texture_url=texture_data.get("texture_url", ""),
-            prompt=texture_data.get("prompt", f"Demo {panel_id} panel"),
-            dimensions=request.dimensions,
-        )
-        state.set_panel_texture(panel_id, texture)
+    # Add panel textures (validated as one batch)
+    textures = _PANEL_TEXTURES_ADAPTER.validate_python({
+        panel_id: {
+            "panel_id": panel_id,
+            "texture_url": texture_data.get("texture_url", ""),
+            "prompt": texture_data.get("prompt", f"Demo {panel_id} panel"),
+            "dimensions": request.dimensions,
+        }
+        for panel_id, texture_data in request.panel_textures.items()
+    })
+    state.atomic_update_textures(textures)
     
     save_packaging_state(state)
     
@@ -162,52 +213,41 @@ async def seed_from_fixtures():
     This reads the fixtures file and seeds both product and packaging state.
     Make sure to populate demo_fixtures.json with valid URLs first!
     """
-    if not FIXTURES_PATH.exists():
+    try:
+        fixtures = _load_fixtures()
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
-            detail=f"Fixtures file not found: {FIXTURES_PATH}"
+            detail=f"Fixtures file not found: {_FIXTURES_STR}"
         )
-    
-    try:
-        fixtures = json.loads(FIXTURES_PATH.read_text())
-    except json.JSONDecodeError as e:
+    except ValidationError as e:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid JSON in fixtures file: {e}"
+            detail=f"Invalid fixtures file: {e}"
         )
     
     results = {"product": None, "packaging": None}
     
     # Seed product if configured
-    product_data = fixtures.get("product") or fixtures.get("product_create") or {}
-    if product_data.get("model_url") and not product_data["model_url"].startswith("PASTE"):
-        await seed_product(SeedProductRequest(
-            prompt=product_data.get("prompt", "Demo Product"),
-            model_url=product_data["model_url"],
-            preview_images=product_data.get("preview_images", []),
-            no_background_images=product_data.get("no_background_images", []),
-        ))
+    product_data = fixtures.product or fixtures.product_create
+    if product_data and product_data.model_url and not product_data.model_url.startswith("PASTE"):
+        await seed_product(product_data)
         results["product"] = "Seeded"
     else:
         results["product"] = "Skipped (no valid model_url)"
     
     # Seed packaging if configured
-    packaging_data = fixtures.get("packaging") or fixtures.get("packaging_fixtures") or {}
-    panel_textures = packaging_data.get("panel_textures", {})
+    packaging_data = fixtures.packaging or fixtures.packaging_fixtures or SeedPackagingRequest()
     
     # Filter out placeholder URLs
     valid_textures = {
         panel_id: data
-        for panel_id, data in panel_textures.items()
-        if data.get("texture_url") and not data["texture_url"].startswith("PASTE")
+        for panel_id, data in packaging_data.panel_textures.items()
+        if (texture_url := data.get("texture_url")) and not texture_url.startswith("PASTE")
     }
     
     if valid_textures:
-        await seed_packaging(SeedPackagingRequest(
-            package_type=packaging_data.get("package_type", "box"),
-            dimensions=packaging_data.get("dimensions", {"width": 100, "height": 150, "depth": 100}),
-            panel_textures=valid_textures,
-        ))
+        await seed_packaging(packaging_data.model_copy(update={"panel_textures": valid_textures}))
         results["packaging"] = f"Seeded {len(valid_textures)} panels"
     else:
         results["packaging"] = "Skipped (no valid texture URLs)"
@@ -253,10 +293,10 @@ async def export_current_state():
     product_data = {
         "prompt": product_state.prompt if iteration_type == "create" else product_state.latest_instruction,
         "model_url": product_state.trellis_output.model_file if product_state.trellis_output else None,
-        "preview_images": product_state.images[:3] if product_state.images else [],
+        "preview_images": _first_three(product_state.images),
         "no_background_images": (
-            product_state.trellis_output.no_background_images[:3]
-            if product_state.trellis_output and product_state.trellis_output.no_background_images
+            _first_three(product_state.trellis_output.no_background_images)
+            if product_state.trellis_output
             else []
         ),
     }
@@ -284,13 +324,14 @@ async def export_current_state():
 @router.get("/mock-status")
 async def get_mock_status():
     """Check if demo mock mode is enabled and show current configuration."""
-    from app.core.config import settings
-    
+    from app.core.config import get_settings
+
+    settings = get_settings()
     return {
         "demo_mock_mode": settings.DEMO_MOCK_MODE,
         "create_delay_seconds": settings.DEMO_CREATE_DELAY,
         "edit_delay_seconds": settings.DEMO_EDIT_DELAY,
-        "fixtures_path": str(FIXTURES_PATH),
-        "fixtures_exist": FIXTURES_PATH.exists(),
+        "fixtures_path": _FIXTURES_STR,
+        "fixtures_exist": os.path.exists(_FIXTURES_STR),
     }
 
@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Set, Optional
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
 
 from app.models.packaging_state import (
@@ -12,6 +12,7 @@ from app.models.packaging_state import (
     PanelTexture,
     get_packaging_state,
     save_packaging_state,
+    update_packaging_state_fields,
     clear_packaging_state,
 )
 from app.services.panel_generation import panel_generation_service
@@ -19,6 +20,8 @@ from app.services.file_export import (
     export_package_formats,
     export_dieline_formats,
     get_export_file_path,
+    run_export,
+    stat_export_file,
 )
 
 logger = logging.getLogger(__name__)
@@ -54,8 +57,8 @@ def _track_background_task(task: asyncio.Task) -> None:
 @router.post("/panels/generate")
 async def generate_panel_texture(request: PanelGenerateRequest):
     """Generate a texture for a specific panel."""
-    logger.info(f"[packaging-router] Received texture generation request for panel {request.panel_id}")
-    logger.info(f"[packaging-router] Request details: prompt='{request.prompt[:50]}...', package_type={request.package_type}")
+    logger.info("[packaging-router] Received texture generation request for panel %s", request.panel_id)
+    logger.info("[packaging-router] Request details: prompt='%.50s...', package_type=%s", request.prompt, request.package_type)
     
     state = get_packaging_state()
     
@@ -72,7 +75,7 @@ async def generate_panel_texture(request: PanelGenerateRequest):
     state.last_error = None
     save_packaging_state(state)
     
-    logger.info(f"[packaging-router] Starting {workflow} for panel {request.panel_id}")
+    logger.info("[packaging-router] Starting %s for panel %s", workflow, request.panel_id)
     
     # Run generation in background
     async def _generate():
@@ -103,21 +106,21 @@ async def generate_panel_texture(request: PanelGenerateRequest):
                 current_state.generating_panel = None
                 current_state.last_error = None
                 save_packaging_state(current_state)
-                logger.info(f"[packaging-router] Successfully generated texture for panel {request.panel_id}")
+                logger.info("[packaging-router] Successfully generated texture for panel %s", request.panel_id)
             else:
                 error_msg = "Texture generation returned no image - Gemini API may have failed or returned empty result"
                 current_state.mark_error(error_msg)
                 save_packaging_state(current_state)
-                logger.error(f"[packaging-router] Texture generation returned no image for panel {request.panel_id}")
+                logger.error("[packaging-router] Texture generation returned no image for panel %s", request.panel_id)
         except Exception as e:
             # Get fresh state for error handling
             current_state = get_packaging_state()
             error_message = f"{type(e).__name__}: {str(e)}"
             current_state.mark_error(error_message)
             save_packaging_state(current_state)
-            logger.error(f"[packaging-router] Error generating texture for panel {request.panel_id}: {error_message}", exc_info=True)
+            logger.error("[packaging-router] Error generating texture for panel %s: %s", request.panel_id, error_message, exc_info=True)
     
-    task = asyncio.create_task(_generate())
+    task = asyncio.create_task(_generate(), name=f"packaging-panel-{request.panel_id}")
     _track_background_task(task)
     
     return {
@@ -130,9 +133,9 @@ async def generate_panel_texture(request: PanelGenerateRequest):
 @router.post("/panels/generate-all")
 async def generate_all_panels(request: BulkPanelGenerateRequest):
     """Generate textures for all panels at once."""
-    logger.info(f"[packaging-router] Received bulk generation request for {len(request.panel_ids)} panels")
-    logger.info(f"[packaging-router] Panels: {request.panel_ids}")
-    logger.info(f"[packaging-router] Prompt: '{request.prompt[:50]}...'")
+    logger.info("[packaging-router] Received bulk generation request for %s panels", len(request.panel_ids))
+    logger.info("[packaging-router] Panels: %s", request.panel_ids)
+    logger.info("[packaging-router] Prompt: '%.50s...'", request.prompt)
     
     state = get_packaging_state()
     
@@ -148,7 +151,7 @@ async def generate_all_panels(request: BulkPanelGenerateRequest):
     state.last_error = None
     save_packaging_state(state)
     
-    logger.info(f"[packaging-router] Starting bulk texture generation for {len(request.panel_ids)} panels")
+    logger.info("[packaging-router] Starting bulk texture generation for %s panels", len(request.panel_ids))
     
     # Run generation in background with two-phase approach
     async def _generate_all():
@@ -160,7 +163,7 @@ async def generate_all_panels(request: BulkPanelGenerateRequest):
         workflow = "edit" if has_existing else "create"
         
         # PHASE 1: Generate 3D mockup of the entire box as master reference
-        logger.info(f"[packaging-router] PHASE 1: Generating 3D mockup reference ({workflow})")
+        logger.info("[packaging-router] PHASE 1: Generating 3D mockup reference (%s)", workflow)
         
         try:
             from app.integrations.gemini import gemini_image_service
@@ -240,14 +243,14 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
                 master_mockup_url = request.reference_mockup
             else:
                 master_mockup_url = mockup_images[0]
-                logger.info(f"[packaging-router] ✅ 3D mockup generated successfully")
+                logger.info("[packaging-router] ✅ 3D mockup generated successfully")
                 
         except Exception as e:
-            logger.error(f"[packaging-router] Error generating 3D mockup: {e}", exc_info=True)
+            logger.error("[packaging-router] Error generating 3D mockup: %s", e, exc_info=True)
             master_mockup_url = request.reference_mockup  # Fallback
         
         # PHASE 2: Parallelize all panels using 3D mockup as reference
-        logger.info(f"[packaging-router] PHASE 2: Generating {len(request.panel_ids)} panels in parallel")
+        logger.info("[packaging-router] PHASE 2: Generating %s panels in parallel", len(request.panel_ids))
         
         # Create parallel tasks for ALL panels
         async def generate_panel(panel_id: str):
@@ -278,7 +281,7 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
                 else:
                     return (panel_id, None, panel_dims)
             except Exception as e:
-                logger.error(f"[packaging-router] Error generating panel {panel_id}: {e}")
+                logger.error("[packaging-router] Error generating panel %s: %s", panel_id, e)
                 return (panel_id, None, None)
         
         # Run ALL panels in parallel
@@ -287,7 +290,7 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
         # Process results
         for result in results:
             if isinstance(result, Exception):
-                logger.error(f"[packaging-router] Task exception: {result}")
+                logger.error("[packaging-router] Task exception: %s", result)
                 continue
             
             panel_id, texture_url, panel_dims = result
@@ -301,7 +304,7 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
             else:
                 failed_panels.append(panel_id)
         
-        logger.info(f"[packaging-router] ✅ Parallel generation complete: {len(generated_textures)}/{len(request.panel_ids)} succeeded")
+        logger.info("[packaging-router] ✅ Parallel generation complete: %s/%s succeeded", len(generated_textures), len(request.panel_ids))
         
         # ATOMIC UPDATE: Save all textures at once
         final_state = get_packaging_state()
@@ -317,14 +320,14 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
             total_count = len(request.panel_ids)
             error_msg = f"Generated {succeeded_count}/{total_count} textures. Failed: {', '.join(failed_panels)} (old textures retained)"
             final_state.last_error = error_msg
-            logger.error(f"[packaging-router] Bulk generation completed with errors: {error_msg}")
+            logger.error("[packaging-router] Bulk generation completed with errors: %s", error_msg)
         else:
             final_state.last_error = None
-            logger.info(f"[packaging-router] Bulk generation completed successfully for all {len(request.panel_ids)} panels")
+            logger.info("[packaging-router] Bulk generation completed successfully for all %s panels", len(request.panel_ids))
         
         save_packaging_state(final_state)
     
-    task = asyncio.create_task(_generate_all())
+    task = asyncio.create_task(_generate_all(), name="packaging-bulk-generate")
     _track_background_task(task)
     
     return {
@@ -339,7 +342,7 @@ Generate a complete 3D mockup with full-coverage design on all faces."""
 async def get_packaging_state_endpoint():
     """Get the current packaging state."""
     state = get_packaging_state()
-    return state.as_json()
+    return Response(state.model_dump_json(), media_type="application/json")
 
 
 @router.get("/panels/{panel_id}/texture")
@@ -384,14 +387,14 @@ class UpdateDimensionsRequest(BaseModel):
 @router.post("/update-dimensions")
 async def update_dimensions(request: UpdateDimensionsRequest):
     """Update package dimensions and type."""
-    logger.info(f"[packaging-router] Received update: type={request.package_type}, dims={request.dimensions}")
+    logger.info("[packaging-router] Received update: type=%s, dims=%s", request.package_type, request.dimensions)
     
     state = get_packaging_state()
     state.package_type = request.package_type
     state.package_dimensions = request.dimensions
     save_packaging_state(state)
     
-    logger.info(f"[packaging-router] ✅ Updated and saved to Redis")
+    logger.info("[packaging-router] ✅ Updated and saved to Redis")
     return {"status": "updated", "package_type": request.package_type, "dimensions": request.dimensions}
 
 
@@ -426,7 +429,7 @@ async def reset_current_shape():
     
     save_packaging_state(state)
     
-    logger.info(f"[packaging-router] Reset {current_type} to defaults")
+    logger.info("[packaging-router] Reset %s to defaults", current_type)
     return {
         "message": f"Reset {current_type} to default state",
         "package_type": current_type,
@@ -439,7 +442,7 @@ async def clear_state():
     """Reset packaging state to defaults."""
     state = clear_packaging_state()
     logger.info("[packaging-router] Cleared packaging state")
-    return state.as_json()
+    return Response(state.model_dump_json(), media_type="application/json")
 
 
 @router.post("/export")
@@ -451,18 +454,18 @@ async def trigger_package_export():
     session_id = str(int(state.updated_at.timestamp()))
     
     try:
-        export_files = export_package_formats(state, session_id)
+        export_files = await run_export(export_package_formats, state, session_id)
         
         # Update state with export file paths
         state.export_files = {fmt: str(path) for fmt, path in export_files.items()}
-        save_packaging_state(state)
+        update_packaging_state_fields(state, "export_files")
         
         return {
             "status": "success",
             "files": {fmt: str(path) for fmt, path in export_files.items()},
         }
     except Exception as e:
-        logger.error(f"[packaging-router] Export failed: {e}", exc_info=True)
+        logger.error("[packaging-router] Export failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 
@@ -477,18 +480,19 @@ async def download_package_export(format: str):
     
     file_path = get_export_file_path(session_id, "package", format)
     
-    if not file_path or not file_path.exists():
+    if not file_path:
         # Try to generate if not exists
         try:
-            export_files = export_package_formats(state, session_id)
+            export_files = await run_export(export_package_formats, state, session_id)
             state.export_files = {fmt: str(path) for fmt, path in export_files.items()}
-            save_packaging_state(state)
+            update_packaging_state_fields(state, "export_files")
             file_path = export_files.get(format)
         except Exception as e:
-            logger.error(f"[packaging-router] Export generation failed: {e}", exc_info=True)
+            logger.error("[packaging-router] Export generation failed: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Export generation failed: {str(e)}")
     
-    if not file_path or not file_path.exists():
+    stat_result = stat_export_file(file_path)
+    if stat_result is None:
         raise HTTPException(status_code=404, detail=f"Export file not found: {format}")
     
     media_type_map = {
@@ -499,6 +503,7 @@ async def download_package_export(format: str):
     
     return FileResponse(
         str(file_path),
+        stat_result=stat_result,
         media_type=media_type_map.get(format, "application/octet-stream"),
         filename=f"package.{format if format != 'blend' else 'obj'}",
     )
@@ -513,18 +518,18 @@ async def trigger_dieline_export():
     session_id = str(int(state.updated_at.timestamp()))
     
     try:
-        export_files = export_dieline_formats(state, session_id)
+        export_files = await run_export(export_dieline_formats, state, session_id)
         
         # Update state with export file paths
         state.dieline_export_files = {fmt: str(path) for fmt, path in export_files.items()}
-        save_packaging_state(state)
+        update_packaging_state_fields(state, "dieline_export_files")
         
         return {
             "status": "success",
             "files": {fmt: str(path) for fmt, path in export_files.items()},
         }
     except Exception as e:
-        logger.error(f"[packaging-router] Dieline export failed: {e}", exc_info=True)
+        logger.error("[packaging-router] Dieline export failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Dieline export failed: {str(e)}")
 
 
@@ -539,18 +544,19 @@ async def download_dieline_export(format: str):
     
     file_path = get_export_file_path(session_id, "dieline", format)
     
-    if not file_path or not file_path.exists():
+    if not file_path:
         # Try to generate if not exists
         try:
-            export_files = export_dieline_formats(state, session_id)
+            export_files = await run_export(export_dieline_formats, state, session_id)
             state.dieline_export_files = {fmt: str(path) for fmt, path in export_files.items()}
-            save_packaging_state(state)
+            update_packaging_state_fields(state, "dieline_export_files")
             file_path = export_files.get(format)
         except Exception as e:
-            logger.error(f"[packaging-router] Dieline export generation failed: {e}", exc_info=True)
+            logger.error("[packaging-router] Dieline export generation failed: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Dieline export generation failed: {str(e)}")
     
-    if not file_path or not file_path.exists():
+    stat_result = stat_export_file(file_path)
+    if stat_result is None:
         raise HTTPException(status_code=404, detail=f"Dieline export file not found: {format}")
     
     media_type_map = {
@@ -561,6 +567,7 @@ async def download_dieline_export(format: str):
     
     return FileResponse(
         str(file_path),
+        stat_result=stat_result,
         media_type=media_type_map.get(format, "application/octet-stream"),
         filename=f"dieline.{format}",
     )
@@ -1,39 +1,57 @@
 import asyncio
 import logging
-from typing import Set
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
 
 from app.models.product_state import (
     ProductState,
     ProductStatus,
     get_product_state,
-    get_product_status,
-    save_product_state,
-    save_product_status,
-    clear_product_state,
-    _utcnow,
+    get_cached_product_status,
+    get_product_state_json,
+    save_product_snapshot,
+    claim_product_generation,
+    update_product_state_fields,
+    _epoch_ms,
 )
-from app.core.config import settings
+from app.core.config import get_settings
 from app.services.product_pipeline import product_pipeline_service
 from app.services.demo_mock_pipeline import demo_mock_pipeline
 from app.services.file_export import (
     export_product_formats,
     get_export_file_path,
+    run_export,
+    stat_export_file,
 )
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Settings are frozen for the process lifetime, so read the flag once
+_DEMO_MOCK_MODE = settings.DEMO_MOCK_MODE
 
 
 def _is_demo_mock_mode() -> bool:
     """Check if demo mock mode is enabled."""
-    return settings.DEMO_MOCK_MODE
+    return _DEMO_MOCK_MODE
 
 router = APIRouter(prefix="/product", tags=["product"])
 _background_tasks: Set[asyncio.Task] = set()
 
+# (model_file, format) -> exported file, least recently used first. Keyed on the
+# source model rather than the updated_at-derived session id, which moves every
+# time the export paths are saved.
+_EXPORT_CACHE_SIZE = 32
+_export_cache: OrderedDict[Tuple[str, str], Path] = OrderedDict()
+# session_id -> export currently running for it, shared by every caller that needs it
+_export_inflight: Dict[str, "asyncio.Task[Dict[str, Path]]"] = {}
+
 
 class ProductCreateRequest(BaseModel):
     prompt: str = Field(..., min_length=5, max_length=2000)
@@ -45,7 +63,8 @@ class ProductEditRequest(BaseModel):
 
 
 def _has_active_tasks() -> bool:
-    return any(not task.done() for task in _background_tasks)
+    # Finished tasks remove themselves, so the set only holds running ones
+    return bool(_background_tasks)
 
 
 def _auto_recover_if_needed(state: ProductState) -> bool:
@@ -64,15 +83,18 @@ def _auto_recover_if_needed(state: ProductState) -> bool:
     state.in_progress = False
     state.status = "idle"
     state.message = "Recovered from interrupted generation"
-    state.generation_started_at = None
-    save_product_state(state)
+    state.generation_started_at_ms = None
 
     status_payload = ProductStatus(
         status="idle",
         progress=0,
         message="Recovered from interrupted generation",
     )
-    save_product_status(status_payload)
+    save_product_snapshot(
+        state,
+        status_payload,
+        fields=("in_progress", "status", "message", "generation_started_at_ms"),
+    )
     return True
 
 
@@ -83,8 +105,59 @@ def _ensure_not_busy(state: ProductState) -> None:
         raise HTTPException(status_code=409, detail="Generation already running")
 
 
+def _claim_generation(state: ProductState, payload: ProductStatus, fields: Optional[Tuple[str, ...]] = None) -> None:
+    """Persist the pending state + status, or 409 if another request claimed the run first.
+
+    _ensure_not_busy is only a fast pre-check against the cached state; this
+    is the atomic check-and-set on the server that closes the race between
+    concurrent start requests.
+    """
+    if not claim_product_generation(state, payload, fields):
+        raise HTTPException(status_code=409, detail="Generation already running")
+
+
+def _model_response(model: BaseModel) -> Response:
+    """Serialize a pydantic model straight to a JSON response (no intermediate dict)."""
+    return Response(model.model_dump_json(), media_type="application/json")
+
+
+def _remember_exports(model_file: str, export_files: Dict[str, Path]) -> None:
+    for fmt, path in export_files.items():
+        _export_cache[(model_file, fmt)] = path
+        _export_cache.move_to_end((model_file, fmt))
+    while len(_export_cache) > _EXPORT_CACHE_SIZE:
+        _export_cache.popitem(last=False)
+
+
+async def _run_export(state: ProductState, session_id: str) -> Dict[str, Path]:
+    export_files = await run_export(export_product_formats, state, session_id)
+    _remember_exports(state.trellis_output.model_file, export_files)
+    # Only export_files: other writers may have updated the state during the export
+    state.export_files = {fmt: str(path) for fmt, path in export_files.items()}
+    update_product_state_fields(state, "export_files")
+    return export_files
+
+
+async def _export_product(state: ProductState, session_id: str) -> Dict[str, Path]:
+    """Export the product for ``session_id``, joining an export already running for it.
+
+    Concurrent callers share one run instead of each re-running the export.
+    A caller that goes away (e.g. a dropped download) doesn't cancel it for the others.
+    """
+    task = _export_inflight.get(session_id)
+    if task is None:
+        task = asyncio.create_task(_run_export(state, session_id), name=f"product-export-{session_id}")
+        _export_inflight[session_id] = task
+        task.add_done_callback(lambda _: _export_inflight.pop(session_id, None))
+    return await asyncio.shield(task)
+
+
 def _track_background_task(task: asyncio.Task) -> None:
-    """Keep a reference to background work so it isn’t GC’d prematurely."""
+    """Keep a reference to background work so it isn’t GC’d prematurely.
+
+    The event loop only holds weak references to tasks (still true on 3.12+),
+    so this set is what keeps a running pipeline alive.
+    """
     _background_tasks.add(task)
     task.add_done_callback(_background_tasks.discard)
 
@@ -96,7 +169,7 @@ async def start_create(request: ProductCreateRequest):
     _ensure_not_busy(state)
 
     is_mock = _is_demo_mock_mode()
-    logger.info(f"[product-router] Queuing create request {'(DEMO MOCK MODE)' if is_mock else ''}")
+    logger.info("[product-router] Queuing create request %s", "(DEMO MOCK MODE)" if is_mock else "")
     
     state.prompt = request.prompt
     state.latest_instruction = request.prompt
@@ -104,25 +177,30 @@ async def start_create(request: ProductCreateRequest):
     state.status = "pending"
     state.message = "Preparing product generation"
     state.in_progress = True
-    state.generation_started_at = _utcnow()  # Track start time for frontend timer
+    state.generation_started_at_ms = _epoch_ms()  # Track start time for frontend timer
     state.image_count = request.image_count
     state.images = []
     state.trellis_output = None
     state.iterations = []
     state.last_error = None
-    save_product_state(state)
 
     payload = ProductStatus(status="pending", progress=0, message="Preparing product generation")
-    save_product_status(payload)
+    _claim_generation(state, payload)
 
     # Use mock pipeline in demo mode, real pipeline otherwise
     if is_mock:
-        task = asyncio.create_task(demo_mock_pipeline.run_mock_create(request.prompt, request.image_count))
+        task = asyncio.create_task(
+            demo_mock_pipeline.run_mock_create(request.prompt, request.image_count),
+            name="product-pipeline-mock-create",
+        )
     else:
-        task = asyncio.create_task(product_pipeline_service.run_create(request.prompt, request.image_count))
+        task = asyncio.create_task(
+            product_pipeline_service.run_create(request.prompt, request.image_count),
+            name="product-pipeline-create",
+        )
     
     _track_background_task(task)
-    return payload.model_dump(mode="json")
+    return _model_response(payload)
 
 
 @router.post("/edit")
@@ -137,25 +215,34 @@ async def start_edit(request: ProductEditRequest):
     if not is_mock and (not state.prompt or not state.images):
         raise HTTPException(status_code=400, detail="No base product available to edit")
 
-    logger.info(f"[product-router] Queuing edit request {'(DEMO MOCK MODE)' if is_mock else ''}")
+    logger.info("[product-router] Queuing edit request %s", "(DEMO MOCK MODE)" if is_mock else "")
     state.latest_instruction = request.prompt
     state.mode = "edit"
     state.status = "pending"
     state.message = "Preparing edit request"
     state.in_progress = True
-    state.generation_started_at = _utcnow()  # Track start time for frontend timer
-    save_product_state(state)
+    state.generation_started_at_ms = _epoch_ms()  # Track start time for frontend timer
 
     payload = ProductStatus(status="pending", progress=0, message="Preparing edit request")
-    save_product_status(payload)
+    _claim_generation(
+        state,
+        payload,
+        fields=("latest_instruction", "mode", "status", "message", "in_progress", "generation_started_at_ms"),
+    )
 
     # Use mock pipeline in demo mode, real pipeline otherwise
     if is_mock:
-        task = asyncio.create_task(demo_mock_pipeline.run_mock_edit(request.prompt))
+        task = asyncio.create_task(
+            demo_mock_pipeline.run_mock_edit(request.prompt),
+            name="product-pipeline-mock-edit",
+        )
     else:
-        task = asyncio.create_task(product_pipeline_service.run_edit(request.prompt))
+        task = asyncio.create_task(
+            product_pipeline_service.run_edit(request.prompt),
+            name="product-pipeline-edit",
+        )
     _track_background_task(task)
-    return payload.model_dump(mode="json")
+    return _model_response(payload)
 
 
 class TrellisOnlyRequest(BaseModel):
@@ -191,7 +278,13 @@ async def start_trellis_only(request: TrellisOnlyRequest):
     state = get_product_state()
     _ensure_not_busy(state)
     
-    logger.info(f"[product-router] Queuing Trellis-only request with {len(request.images)} images")
+    # Identical payloads add nothing for Trellis but would be stored (and uploaded) once per copy
+    images = list(dict.fromkeys(request.images))
+    logger.info(
+        "[product-router] Queuing Trellis-only request with %s images (%s unique)",
+        len(request.images),
+        len(images),
+    )
     
     # Set up initial state
     if request.mode == "create":
@@ -204,41 +297,56 @@ async def start_trellis_only(request: TrellisOnlyRequest):
     state.status = "pending"
     state.message = "Preparing 3D generation from pre-generated images"
     state.in_progress = True
-    state.generation_started_at = _utcnow()
-    state.images = request.images
+    state.generation_started_at_ms = _epoch_ms()
+    state.images = images
     state.last_error = None
-    save_product_state(state)
     
     payload = ProductStatus(
         status="pending",
         progress=0,
         message="Preparing 3D generation from pre-generated images"
     )
-    save_product_status(payload)
+    _claim_generation(state, payload)
     
     task = asyncio.create_task(
         product_pipeline_service.run_trellis_only(
             prompt=request.prompt,
-            images=request.images,
+            images=images,
             mode=request.mode,
-        )
+        ),
+        name="product-pipeline-trellis-only",
     )
     _track_background_task(task)
-    return payload.model_dump(mode="json")
+    return _model_response(payload)
 
 
 @router.get("")
 async def fetch_product_state():
     """Return the entire persisted state blob for the frontend to hydrate."""
-    state = get_product_state()
-    return state.model_dump(mode="json")
+    return Response(get_product_state_json(), media_type="application/json")
+
+
+def _status_etag(version: int) -> str:
+    return f'W/"{version}"'
 
 
 @router.get("/status")
-async def fetch_product_status():
-    """Return the lightweight status payload (small + poll-friendly)."""
-    status = get_product_status()
-    return status.model_dump(mode="json")
+async def fetch_product_status(request: Request):
+    """Return the lightweight status payload (small + poll-friendly).
+
+    Responses carry a weak ETag derived from the status version counter, so
+    pollers that send ``If-None-Match`` get an empty 304 until something changes.
+    """
+    # Concurrent pollers share one read per short window instead of each hitting Redis
+    status = get_cached_product_status()
+    etag = _status_etag(status.version)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response = _model_response(status)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @router.post("/recover")
@@ -281,7 +389,6 @@ async def rewind_product(iteration_index: int):
     state.message = "Rewound to previous version"
     state.in_progress = False
     state.last_error = None
-    save_product_state(state)
 
     preview = None
     if target_iteration.trellis_output and target_iteration.trellis_output.no_background_images:
@@ -293,7 +400,7 @@ async def rewind_product(iteration_index: int):
         model_file=target_iteration.trellis_output.model_file if target_iteration.trellis_output else None,
         preview_image=preview,
     )
-    save_product_status(status_payload)
+    save_product_snapshot(state, status_payload)
 
     return {
         "status": "rewound",
@@ -314,18 +421,15 @@ async def trigger_product_export():
     session_id = str(int(state.updated_at.timestamp()))
     
     try:
-        export_files = export_product_formats(state, session_id)
-        
-        # Update state with export file paths
-        state.export_files = {fmt: str(path) for fmt, path in export_files.items()}
-        save_product_state(state)
+        # Also updates state with export file paths
+        export_files = await _export_product(state, session_id)
         
         return {
             "status": "success",
             "files": {fmt: str(path) for fmt, path in export_files.items()},
         }
     except Exception as e:
-        logger.error(f"[product-router] Export failed: {e}", exc_info=True)
+        logger.error("[product-router] Export failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 
@@ -341,21 +445,25 @@ async def download_product_export(format: str):
         raise HTTPException(status_code=400, detail="No product model available for export")
     
     session_id = str(int(state.updated_at.timestamp()))
+    cache_key = (state.trellis_output.model_file, format)
     
-    file_path = get_export_file_path(session_id, "product", format)
+    file_path = _export_cache.get(cache_key) or get_export_file_path(session_id, "product", format)
+    stat_result = stat_export_file(file_path)
     
-    if not file_path or not file_path.exists():
+    if stat_result is None:
+        _export_cache.pop(cache_key, None)
         # Try to generate if not exists
         try:
-            export_files = export_product_formats(state, session_id)
-            state.export_files = {fmt: str(path) for fmt, path in export_files.items()}
-            save_product_state(state)
+            export_files = await _export_product(state, session_id)
             file_path = export_files.get(format)
         except Exception as e:
-            logger.error(f"[product-router] Export generation failed: {e}", exc_info=True)
+            logger.error("[product-router] Export generation failed: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Export generation failed: {str(e)}")
+        stat_result = stat_export_file(file_path)
+    elif cache_key in _export_cache:
+        _export_cache.move_to_end(cache_key)
     
-    if not file_path or not file_path.exists():
+    if stat_result is None:
         raise HTTPException(status_code=404, detail=f"Export file not found: {format}")
     
     media_type_map = {
@@ -366,6 +474,7 @@ async def download_product_export(format: str):
     
     return FileResponse(
         str(file_path),
+        stat_result=stat_result,
         media_type=media_type_map.get(format, "application/octet-stream"),
         filename=f"product.{format if format != 'blend' else 'obj'}",
     )
@@ -375,9 +484,9 @@ async def download_product_export(format: str):
 async def clear_state():
     """Reset product state to defaults."""
     logger.info("[product-router] Clearing product state")
-    state = clear_product_state()
+    state = ProductState()
     status = ProductStatus(status="idle", message="Product state cleared")
-    save_product_status(status)
+    save_product_snapshot(state, status)
     logger.info("[product-router] Product state cleared successfully")
     return {
         "message": "Product state cleared",
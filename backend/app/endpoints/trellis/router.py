@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Literal, Optional
 
-from app.integrations.trellis import trellis_service, TrellisOutput
+from app.integrations.trellis import get_trellis_service, TrellisOutput
 from app.core.redis import redis_service
 import logging
 import traceback
@@ -30,6 +30,7 @@ TRELLIS_PRESETS = {
         "slat_guidance_strength": 3.2,
     },
 }
+_PRESET_KEYS = tuple(TRELLIS_PRESETS["balanced"])
 
 class Generate3DRequest(BaseModel):
     images: List[str]
@@ -58,10 +59,11 @@ async def generate_3d_asset(request: Generate3DRequest):
     - no_background_images: Preprocessed images (if return_no_background=True)
     """
     try:
-        logger.info("=" * 80)
-        logger.info("TRELLIS REQUEST PARAMETERS:")
-        logger.info(f"  images: {request.images}")
-        logger.info("=" * 80)
+        logger.info(
+            "TRELLIS REQUEST PARAMETERS: images=%d quality=%s seed=%d",
+            len(request.images), request.quality, request.seed,
+        )
+        logger.debug("  images: %s", request.images)
 
         _set_status(
             {
@@ -71,34 +73,21 @@ async def generate_3d_asset(request: Generate3DRequest):
             }
         )
 
-        preset = TRELLIS_PRESETS.get(request.quality, TRELLIS_PRESETS["balanced"]).copy()
-        config = {**preset}
-        overrides = {
-            "texture_size": request.texture_size,
-            "mesh_simplify": request.mesh_simplify,
-            "ss_sampling_steps": request.ss_sampling_steps,
-            "ss_guidance_strength": request.ss_guidance_strength,
-            "slat_sampling_steps": request.slat_sampling_steps,
-            "slat_guidance_strength": request.slat_guidance_strength,
-        }
-        for key, value in overrides.items():
+        # Preset values with any explicit overrides from the request on top
+        config = {**TRELLIS_PRESETS.get(request.quality, TRELLIS_PRESETS["balanced"])}
+        for key in _PRESET_KEYS:
+            value = getattr(request, key)
             if value is not None:
                 config[key] = value
 
         use_multi = request.use_multi_image if request.use_multi_image is not None else len(request.images) > 1
-        multi_algo = request.multiimage_algo
 
-        output = trellis_service.generate_3d_asset(
+        output = await get_trellis_service().generate_3d_asset(
             images=request.images,
             seed=request.seed,
-            texture_size=config["texture_size"],
-            mesh_simplify=config["mesh_simplify"],
-            ss_sampling_steps=config["ss_sampling_steps"],
-            ss_guidance_strength=config["ss_guidance_strength"],
-            slat_sampling_steps=config["slat_sampling_steps"],
-            slat_guidance_strength=config["slat_guidance_strength"],
             use_multi_image=use_multi,
-            multiimage_algo=multi_algo,
+            multiimage_algo=request.multiimage_algo,
+            **config,
         )
         logger.info("Successfully generated 3D asset")
         _set_status(
@@ -113,7 +102,7 @@ async def generate_3d_asset(request: Generate3DRequest):
         )
         return output
     except Exception as e:
-        logger.error(f"Error generating 3D asset: {str(e)}")
+        logger.error("Error generating 3D asset: %s", e)
         logger.error(traceback.format_exc())
         _set_status(
             {
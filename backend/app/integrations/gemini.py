@@ -1,16 +1,63 @@
 import asyncio
 import logging
 import base64
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 
 from pydantic import ValidationError
 
 from google import genai
 from google.genai import types
 
-from app.core.config import settings
+from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Camera angles for multi-view 3D reconstruction
+# These angles provide maximum surface coverage for photogrammetry
+CAMERA_ANGLES = (
+    "front view at eye level, perfectly centered",
+    "45-degree angle from upper right, showing top and right side",
+    "side profile view from the left at eye level",
+)
+
+# Prompt templates, filled per view with str.format
+EDIT_PROMPT_TEMPLATE = (
+    "You are editing the exact same product shown in the reference image.\n\n"
+    "BASE PRODUCT: {base_desc}\n"
+    "USER EDIT REQUEST: {edit_instruction}\n\n"
+    "Follow these rules strictly:\n"
+    "1. Keep the same product family, proportions, and materials unless the instruction explicitly "
+    "changes them. Every other detail must stay identical.\n"
+    "2. Interpret casual phrases like \"make it...\", \"color it...\", \"give it...\" as concrete, "
+    "visible edits. Exaggerate the requested change so it is obvious in a comparison.\n"
+    "3. Maintain the pure white studio background, matching lighting, lens, framing, and camera height.\n"
+    "4. Deliver a crisp studio photograph from {angle_description}. No extra props, text, or watermarks.\n"
+)
+
+CREATE_PROMPT_TEMPLATE = (
+    "Create a professional studio product photograph of {prompt}, "
+    "shot from a {angle_description}. "
+    "Photograph the product on a pure white background with professional studio lighting that creates "
+    "soft, subtle shadows. Use sharp focus to capture clear, well-defined edges. "
+    "Center the product in the frame and fill the frame while ensuring the entire product is visible - "
+    "nothing should be cropped or cut off. The design should be consistent and suitable for viewing "
+    "from multiple camera angles. Avoid any text overlays, watermarks, or distracting elements."
+)
+
+@dataclass(frozen=True)
+class GeneratedImage:
+    """Raw image bytes as returned by Gemini, kept undecoded until handed to the caller."""
+    raw_bytes: bytes
+    mime: str = "image/png"
+
+    def to_data_url(self) -> str:
+        return f"data:{self.mime};base64,{base64.b64encode(self.raw_bytes).decode()}"
+
+
+# Reference images: data URLs from callers, or views generated earlier in the same request
+ReferenceImage = Union[str, GeneratedImage]
 
 class GeminiError(Exception):
     """Gemini service errors."""
@@ -42,98 +89,35 @@ class GeminiImageService:
         self.image_size = settings.GEMINI_IMAGE_SIZE
         self.aspect_ratio = settings.GEMINI_IMAGE_ASPECT_RATIO
         
-        logger.info(f"[gemini-image] Initialized with Pro model: {self.pro_model}, Flash model: {self.flash_model}")
-
-    def generate_product_images_sync(
-        self,
-        prompt: str,
-        workflow: str,
-        image_count: int = 1,
-        reference_images: Optional[List[str]] = None,
-        is_texture: bool = False,
-        base_description: Optional[str] = None,
-    ) -> List[str]:
-        """Generate clean product views using Gemini Image API (synchronous).
+        # Built once: the image config only depends on settings
+        image_config_kwargs: Dict[str, Any] = {"aspect_ratio": "1:1"}
+        if self.image_size:
+            image_config_kwargs["image_size"] = self.image_size
+        self.image_config = types.ImageConfig.model_construct(**image_config_kwargs)
         
-        Args:
-            prompt: Description of the product or edit instruction
-            workflow: "create" or "edit" - determines model selection
-            image_count: Number of images to generate
-            reference_images: Reference images for edit workflow
-            
-        Returns:
-            List of base64-encoded image data URLs
-        """
-        if not self.client:
-            raise GeminiError("Gemini client not initialized for product images")
+        self._semaphore: Optional[asyncio.Semaphore] = None
         
-        # Workflow-based model selection (hardcoded policy)
+        logger.info(f"[gemini-image] Initialized with Pro model: {self.pro_model}, Flash model: {self.flash_model}")
+
+    def _select_model(self, workflow: str) -> Tuple[str, Optional[str]]:
+        """Workflow-based model selection (hardcoded policy)."""
         # Note: Image generation models don't support thinking levels, so we disable it
         if workflow == "create":
             model_to_use = self.pro_model
-            thinking = None  # Image generation models don't support thinking
             logger.info(f"[gemini] CREATE workflow: using {model_to_use} (thinking disabled for image models)")
-        elif workflow == "edit":
+            return model_to_use, None
+        if workflow == "edit":
             model_to_use = self.flash_model
-            thinking = None  # Flash doesn't support thinking
             logger.info(f"[gemini] EDIT workflow: using {model_to_use} (thinking disabled)")
-        else:
-            raise ValueError(f"Unknown workflow: {workflow}. Expected 'create' or 'edit'")
-        
-        valid_images = []
-        
-        # For /create flow: generate first image, then use it as reference for additional angles
-        # For /edit flow: use provided reference_images for all generations
-        is_create_flow = workflow == "create"
-        
-        for i in range(image_count):
-            try:
-                # For create flow: first image establishes the product, subsequent use it as reference
-                if is_create_flow and i == 0:
-                    # First view: establish the product design
-                    img = self._generate_single_image(
-                        prompt,
-                        None,
-                        thinking,
-                        model_to_use,
-                        angle_index=i,
-                        is_texture=is_texture,
-                        base_description=base_description,
-                    )
-                elif is_create_flow and i > 0:
-                    # Subsequent views: same product from different angles
-                    img = self._generate_single_image(
-                        prompt,
-                        valid_images[:1],
-                        thinking,
-                        model_to_use,
-                        angle_index=i,
-                        is_texture=is_texture,
-                        base_description=base_description,
-                    )
-                else:
-                    # Edit flow: use provided reference
-                    img = self._generate_single_image(
-                        prompt,
-                        reference_images,
-                        thinking,
-                        model_to_use,
-                        angle_index=i,
-                        is_texture=is_texture,
-                        base_description=base_description,
-                    )
-                
-                if img:
-                    valid_images.append(img)
-                    logger.info(f"[gemini] Image {i+1}/{image_count} generated successfully with model {model_to_use}")
-                else:
-                    logger.warning(f"[gemini] Image {i+1}/{image_count} generation returned None")
-            except Exception as exc:
-                logger.error(f"[gemini] Image {i+1}/{image_count} generation failed: {exc}")
-        
-        logger.info(f"[gemini] Generated {len(valid_images)}/{image_count} valid product images using {model_to_use}")
-        return valid_images
-    
+            return model_to_use, None
+        raise ValueError(f"Unknown workflow: {workflow}. Expected 'create' or 'edit'")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop; shared by every caller in the process
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        return self._semaphore
+
     async def generate_product_images(
         self,
         prompt: str,
@@ -143,7 +127,13 @@ class GeminiImageService:
         is_texture: bool = False,
         base_description: Optional[str] = None,
     ) -> List[str]:
-        """Generate clean product views using Gemini Image API (async wrapper).
+        """Generate clean product views using Gemini Image API.
+        
+        Independent views are requested concurrently (bounded by
+        GEMINI_MAX_CONCURRENCY across the process). In the create workflow the
+        first view establishes the product and the remaining angles use it as
+        their reference, so they fan out once it is ready; edit views all share
+        the provided reference and fan out immediately.
         
         Args:
             prompt: Description of the product or edit instruction
@@ -153,36 +143,78 @@ class GeminiImageService:
             is_texture: If True, bypass "product photograph" enhancement (for flat textures)
             
         Returns:
-            List of base64-encoded image data URLs
+            List of base64-encoded image data URLs, in view order
         """
-        return await asyncio.to_thread(
-            self.generate_product_images_sync,
-            prompt,
-            workflow,
-            image_count,
-            reference_images,
-            is_texture,
-            base_description,
-        )
+        if not self.client:
+            raise GeminiError("Gemini client not initialized for product images")
+        
+        model_to_use, thinking = self._select_model(workflow)
+        semaphore = self._get_semaphore()
+
+        async def generate(i: int, refs: Optional[Sequence[ReferenceImage]]) -> Optional[GeneratedImage]:
+            async with semaphore:
+                return await self._generate_single_image(
+                    prompt,
+                    refs,
+                    thinking,
+                    model_to_use,
+                    angle_index=i,
+                    is_texture=is_texture,
+                    base_description=base_description,
+                )
+
+        results: List[Any] = []
+        if workflow == "create" and image_count > 0:
+            # First view: establish the product design
+            try:
+                first = await generate(0, None)
+            except Exception as exc:
+                first = exc
+            results.append(first)
+            # Fed back as raw bytes, skipping a base64 encode/decode per view
+            anchor = [first] if isinstance(first, GeneratedImage) else []
+            # Subsequent views: same product from different angles
+            results.extend(await asyncio.gather(
+                *(generate(i, anchor) for i in range(1, image_count)),
+                return_exceptions=True,
+            ))
+        else:
+            # Edit flow: every view uses the primary (first) reference, decoded once up
+            # front rather than once per view
+            refs: Optional[Sequence[ReferenceImage]] = reference_images
+            if reference_images:
+                decoded = _decode_reference(reference_images[0])
+                if decoded is not None:
+                    refs = [decoded]
+            results = await asyncio.gather(
+                *(generate(i, refs) for i in range(image_count)),
+                return_exceptions=True,
+            )
+
+        valid_images = []
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error(f"[gemini] Image {i+1}/{image_count} generation failed: {result}")
+            elif result:
+                valid_images.append(result.to_data_url())
+                logger.info(f"[gemini] Image {i+1}/{image_count} generated successfully with model {model_to_use}")
+            else:
+                logger.warning(f"[gemini] Image {i+1}/{image_count} generation returned None")
+        
+        logger.info(f"[gemini] Generated {len(valid_images)}/{image_count} valid product images using {model_to_use}")
+        return valid_images
 
-    def _generate_single_image(
+    async def _generate_single_image(
         self,
         prompt: str,
-        reference_images: Optional[List[str]],
+        reference_images: Optional[Sequence[ReferenceImage]],
         thinking_level: Optional[str],
         model: str,
         angle_index: int = 0,
         is_texture: bool = False,
         base_description: Optional[str] = None,
-    ) -> Optional[str]:
-        # Define camera angles for multi-view 3D reconstruction
-        # These angles provide maximum surface coverage for photogrammetry
-        angles = [
-            "front view at eye level, perfectly centered",
-            "45-degree angle from upper right, showing top and right side",
-            "side profile view from the left at eye level"
-        ]
-        angle_description = angles[angle_index] if angle_index < len(angles) else "alternate angle"
+    ) -> Optional[GeneratedImage]:
+        angle_description = CAMERA_ANGLES[angle_index] if angle_index < len(CAMERA_ANGLES) else "alternate angle"
         
         # Enhance prompt for clean, 3D-ready product shots OR flat textures
         # Following Gemini best practices: conversational prompts with clear intent
@@ -191,32 +223,15 @@ class GeminiImageService:
             # Don't add "product photograph" prefix - this is a flat texture, not a 3D product
             enhanced_prompt = prompt
         elif reference_images:
-            base_desc = (base_description or "").strip() or "the existing product"
-            edit_instruction = prompt.strip() or "Apply the requested edit."
-            enhanced_prompt = (
-                "You are editing the exact same product shown in the reference image.\n\n"
-                f"BASE PRODUCT: {base_desc}\n"
-                f"USER EDIT REQUEST: {edit_instruction}\n\n"
-                "Follow these rules strictly:\n"
-                "1. Keep the same product family, proportions, and materials unless the instruction explicitly "
-                "changes them. Every other detail must stay identical.\n"
-                "2. Interpret casual phrases like \"make it...\", \"color it...\", \"give it...\" as concrete, "
-                "visible edits. Exaggerate the requested change so it is obvious in a comparison.\n"
-                "3. Maintain the pure white studio background, matching lighting, lens, framing, and camera height.\n"
-                f"4. Deliver a crisp studio photograph from {angle_description}. No extra props, text, or watermarks.\n"
+            enhanced_prompt = EDIT_PROMPT_TEMPLATE.format(
+                base_desc=(base_description or "").strip() or "the existing product",
+                edit_instruction=prompt.strip() or "Apply the requested edit.",
+                angle_description=angle_description,
             )
         else:
             # First view: establish the product
             # Using text-to-image with clear, natural description
-            enhanced_prompt = (
-                f"Create a professional studio product photograph of {prompt}, "
-                f"shot from a {angle_description}. "
-                f"Photograph the product on a pure white background with professional studio lighting that creates "
-                f"soft, subtle shadows. Use sharp focus to capture clear, well-defined edges. "
-                f"Center the product in the frame and fill the frame while ensuring the entire product is visible - "
-                f"nothing should be cropped or cut off. The design should be consistent and suitable for viewing "
-                f"from multiple camera angles. Avoid any text overlays, watermarks, or distracting elements."
-            )
+            enhanced_prompt = CREATE_PROMPT_TEMPLATE.format(prompt=prompt, angle_description=angle_description)
         
         contents: List[types.Part | str] = [enhanced_prompt]
         if reference_images:
@@ -233,24 +248,17 @@ class GeminiImageService:
                 thinking_level=thinking_level
             )
             
-        image_cfg = None
-        image_config_kwargs: Dict[str, Any] = {"aspect_ratio": "1:1"}
-        if self.image_size:
-            image_config_kwargs["image_size"] = self.image_size
-        
-        if image_config_kwargs:
-            image_cfg = types.ImageConfig.model_construct(**image_config_kwargs)
-
         # Construct main config bypassing validation
         config = types.GenerateContentConfig.model_construct(
             thinking_config=thinking_cfg,
-            image_config=image_cfg
+            image_config=self.image_config
         )
 
         try:
             logger.info(f"[gemini] Calling Gemini API with model: {model}, prompt length: {len(enhanced_prompt)}")
             logger.info(f"[gemini] Prompt preview: {enhanced_prompt[:200]}...")
-            response = self.client.models.generate_content(
+            # Native async client: views share its connection pool, no worker thread per call
+            response = await self.client.aio.models.generate_content(
                 model=model,
                 contents=contents,
                 config=config,
@@ -262,7 +270,7 @@ class GeminiImageService:
             raise GeminiError(f"Gemini API call failed: {exc}") from exc
 
 
-def _extract_first_image(response) -> Optional[str]:
+def _extract_first_image(response) -> Optional[GeneratedImage]:
     try:
         logger.info(f"[gemini] Extracting image from response. Response type: {type(response)}")
         logger.info(f"[gemini] Response has 'candidates' attr: {hasattr(response, 'candidates')}")
@@ -277,9 +285,9 @@ def _extract_first_image(response) -> Optional[str]:
                 for i, part in enumerate(candidate.content.parts):
                     logger.info(f"[gemini] Part {i}: type={type(part)}, has inline_data={bool(getattr(part, 'inline_data', None))}")
                     if getattr(part, "inline_data", None):
-                        image_b64 = base64.b64encode(part.inline_data.data).decode()
-                        logger.info(f"[gemini] Successfully extracted image from response ({len(image_b64)} chars)")
-                        return f"data:image/png;base64,{image_b64}"
+                        image_bytes = part.inline_data.data
+                        logger.info(f"[gemini] Successfully extracted image from response ({len(image_bytes)} bytes)")
+                        return GeneratedImage(raw_bytes=image_bytes)
             else:
                 logger.warning(f"[gemini] Candidate has no content.parts. Content: {getattr(candidate, 'content', None)}")
         else:
@@ -300,18 +308,27 @@ def _extract_first_image(response) -> Optional[str]:
         return None
 
 
-def _image_to_part(image_str: str) -> Optional[types.Part]:
-    """Convert a data URL/base64 string into a Gemini content part."""
+def _decode_reference(image: ReferenceImage) -> Optional[GeneratedImage]:
+    """Decode a data URL/base64 reference into raw bytes (generated images pass through)."""
+    if isinstance(image, GeneratedImage):
+        return image
     try:
-        if image_str.startswith("data:image"):
-            header, b64_data = image_str.split(",", 1)
+        if image.startswith("data:image"):
+            header, b64_data = image.split(",", 1)
             mime = header.split(";")[0].split(":")[1]
-            image_bytes = base64.b64decode(b64_data)
-            return types.Part.from_bytes(data=image_bytes, mime_type=mime)
+            return GeneratedImage(raw_bytes=base64.b64decode(b64_data), mime=mime)
     except ValueError as exc:
         logger.warning(f"Failed to convert reference image for Gemini input: {exc}")
     return None
 
 
+def _image_to_part(image: ReferenceImage) -> Optional[types.Part]:
+    """Convert a generated image or data URL/base64 string into a Gemini content part."""
+    decoded = _decode_reference(image)
+    if decoded is None:
+        return None
+    return types.Part.from_bytes(data=decoded.raw_bytes, mime_type=decoded.mime)
+
+
 # Initialize service
 gemini_image_service = GeminiImageService()
\ No newline at end of file
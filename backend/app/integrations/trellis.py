@@ -1,12 +1,40 @@
-import fal_client
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import urllib.request
 import logging
 import os
+import random
 import time
-from typing import Optional, List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, List, Tuple
 from typing_extensions import TypedDict
-from app.core.config import settings
+from app.core.config import get_settings
+from app.core.redis import redis_service
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Keep the "ImportError when fal_client is missing" contract importers rely on,
+# without paying for the fal_client/httpx import until a job actually runs.
+if importlib.util.find_spec("fal_client") is None:
+    raise ImportError("fal_client is not installed")
+
+
+@lru_cache(maxsize=None)
+def _fal_client():
+    """Import fal_client on first use (demo mock mode never needs it)."""
+    import fal_client
+    return fal_client
+
+@lru_cache(maxsize=None)
+def _queue_progress() -> Dict[type, int]:
+    """Progress percentage reported for each fal.ai queue status type."""
+    fal_client = _fal_client()
+    return {fal_client.Queued: 50, fal_client.InProgress: 70}
 
 class TrellisOutput(TypedDict, total=False):
     """Output schema from Trellis model."""
@@ -17,6 +45,42 @@ class TrellisOutput(TypedDict, total=False):
     combined_video: str
     no_background_images: List[str]
 
+def _poll_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    window = settings.TRELLIS_POLL_BASE_SECONDS * (2 ** min(attempt, 16))
+    return random.uniform(0, min(settings.TRELLIS_POLL_CAP_SECONDS, window))
+
+
+def _result_cache_key(images: List[str], params: Dict[str, Any]) -> str:
+    """Content-addressed key for a Trellis job: hash of the input images and parameters."""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    for image in images:
+        digest.update(hashlib.sha256(image.encode()).digest())
+    return f"trellis:result:{digest.hexdigest()}"
+
+
+# A cached result whose URL doesn't answer within this is treated as a miss
+_URL_PROBE_TIMEOUT_SECONDS = 3.0
+
+
+def _url_alive(url: str) -> bool:
+    """HEAD a result URL to make sure a cached asset is still being served."""
+    try:
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request, timeout=_URL_PROBE_TIMEOUT_SECONDS) as response:
+            return response.status < 400
+    except Exception:  # noqa: BLE001 - any failure just means "regenerate"
+        return False
+
+
+@dataclass
+class _JobProgress:
+    """Per-job bookkeeping for relaying fal.ai queue updates to a progress callback."""
+    callback: Optional[Callable[..., None]] = None
+    logs_seen: int = 0
+    last_report: Optional[Tuple[int, str]] = None
+
+
 class TrellisService:
     def __init__(self):
         self.api_key = settings.FAL_KEY
@@ -24,11 +88,21 @@ class TrellisService:
             # Set environment variable for fal_client library
             os.environ["FAL_KEY"] = self.api_key
             # Log first 10 chars for debugging (never log full API keys in production!)
-            logger.info(f"fal.ai API key configured: {self.api_key[:10]}...")
+            logger.info("fal.ai API key configured: %s...", self.api_key[:10])
         else:
             logger.warning("No fal.ai API key found in settings")
+        
+        self._client = None
+    
+    @property
+    def _fal(self):
+        # One client for the service's lifetime, so submit and status polls
+        # reuse its keep-alive connections instead of each request dialing fal.ai
+        if self._client is None:
+            self._client = _fal_client().AsyncClient(key=self.api_key)
+        return self._client
     
-    def generate_3d_asset(
+    async def generate_3d_asset(
         self,
         images: List[str],
         seed: int = 1337,
@@ -42,12 +116,18 @@ class TrellisService:
         progress_callback = None,
         use_multi_image: bool = False,
         multiimage_algo: str = "stochastic",
+        webhook_url: Optional[str] = None,
     ) -> TrellisOutput:
         """
         Generate a 3D asset from input images using Trellis via fal.ai.
         
         Supports single-image and multi-image workflows (set use_multi_image=True).
         
+        The job is submitted to the fal.ai queue and polled without holding a
+        thread, backing off with full jitter (see _poll_delay); each status is
+        forwarded to progress_callback. If webhook_url is given, fal.ai also
+        POSTs the result there.
+        
         🎨 DEMO MODE - Parameters optimized for MAXIMUM QUALITY:
         - texture_size: 2048 (max resolution for crisp textures)
         - mesh_simplify: 0.95 (95% mesh retention for maximum geometric detail)
@@ -65,33 +145,21 @@ class TrellisService:
             
             use_multi = use_multi_image and len(images) > 1
             
-            logger.info("=" * 80)
-            logger.info("🎨 TRELLIS SERVICE - Submitting request to fal.ai")
-            logger.info(f"  Images provided: {len(images)}")
-            if use_multi:
-                for idx, img in enumerate(images, 1):
-                    logger.info(f"    [{idx}] len={len(img)} preview={img[:100]}...")
-            else:
-                logger.info(f"  Image URL length: {len(images[0])}")
-                logger.info(f"  Image URL preview: {images[0][:100]}...")
-            logger.info(f"  seed: {seed}")
-            logger.info(f"  texture_size: {texture_size}")
-            logger.info(f"  mesh_simplify: {mesh_simplify}")
-            logger.info(f"  ss_sampling_steps: {ss_sampling_steps}")
-            logger.info(f"  ss_guidance_strength: {ss_guidance_strength}")
-            logger.info(f"  slat_sampling_steps: {slat_sampling_steps}")
-            logger.info(f"  slat_guidance_strength: {slat_guidance_strength}")
-            logger.info("=" * 80)
-            
-            # Store callback for use in _handle_queue_update
-            self._progress_callback = progress_callback
+            logger.info(
+                "🎨 TRELLIS SERVICE - Submitting request to fal.ai: images=%d multi=%s seed=%d "
+                "texture_size=%d mesh_simplify=%.2f ss=%d/%.1f slat=%d/%.1f",
+                len(images), use_multi, seed, texture_size, mesh_simplify,
+                ss_sampling_steps, ss_guidance_strength, slat_sampling_steps, slat_guidance_strength,
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                for idx, img in enumerate(images if use_multi else images[:1], 1):
+                    logger.debug("    [%d] len=%d preview=%s...", idx, len(img), img[:100])
             
             # Track generation time
-            start_time = time.time()
+            start_time = time.monotonic()
             
-            # Submit request and get result using fal_client.subscribe
-            # This handles submission, polling, and result retrieval automatically
-            arguments = {
+            images = images if use_multi else images[:1]
+            params: Dict[str, Any] = {
                 "seed": seed,
                 "texture_size": texture_size,
                 "mesh_simplify": mesh_simplify,
@@ -99,33 +167,60 @@ class TrellisService:
                 "ss_guidance_strength": ss_guidance_strength,
                 "slat_sampling_steps": slat_sampling_steps,
                 "slat_guidance_strength": slat_guidance_strength,
-                "image_url": images[0],
             }
             if use_multi:
-                arguments["image_urls"] = images
-                arguments["multiimage_algo"] = multiimage_algo
+                params["multiimage_algo"] = multiimage_algo
             
-            result = fal_client.subscribe(
+            # Same images + parameters + seed -> same asset; reuse it while it's still hosted.
+            # The Redis client is synchronous, so its calls run off the event loop.
+            cache_key = _result_cache_key(images, params)
+            cache_ttl = settings.TRELLIS_RESULT_CACHE_TTL_SECONDS
+            cached = await asyncio.to_thread(redis_service.get_json, cache_key) if cache_ttl > 0 else None
+            if isinstance(cached, dict) and cached.get("model_file"):
+                if await asyncio.to_thread(_url_alive, cached["model_file"]):
+                    logger.info("♻️  Reusing cached Trellis result: %s", cached["model_file"])
+                    return cached
+                await asyncio.to_thread(redis_service.delete, cache_key)
+            
+            urls = await self._upload_images(images)
+            arguments = {**params, "image_url": urls[0]}
+            if use_multi:
+                arguments["image_urls"] = urls
+            
+            handler = await self._fal.submit(
                 "fal-ai/trellis",
                 arguments=arguments,
-                with_logs=True,
-                on_queue_update=lambda update: self._handle_queue_update(update)
+                webhook_url=webhook_url,
             )
+            logger.info("Submitted fal.ai request: %s", handler.request_id)
             
-            # Calculate generation time
-            generation_time = time.time() - start_time
+            progress = _JobProgress(progress_callback)
+            attempt = 0
+            last_state = None
+            while True:
+                update = await handler.status(with_logs=True)
+                self._handle_queue_update(update, progress)
+                if isinstance(update, _fal_client().Completed):
+                    break
+                if type(update) is not last_state:
+                    # Queued -> in progress: start backing off from the short window again
+                    last_state = type(update)
+                    attempt = 0
+                await asyncio.sleep(_poll_delay(attempt))
+                attempt += 1
+            result = await handler.get()
             
-            logger.info("=" * 80)
-            logger.info("✓ Request completed successfully")
-            logger.info(f"⏱️  GENERATION TIME: {generation_time:.2f} seconds ({generation_time/60:.2f} minutes)")
-            logger.info("=" * 80)
-            logger.info(f"Result keys: {list(result.keys()) if isinstance(result, dict) else 'not a dict'}")
+            # Calculate generation time
+            generation_time = time.monotonic() - start_time
             
+            logger.info(
+                "✓ Request completed successfully. ⏱️  GENERATION TIME: %.2f seconds (%.2f minutes)",
+                generation_time, generation_time / 60,
+            )
             # Log fal.ai timings if available
             if isinstance(result, dict) and "timings" in result:
-                logger.info(f"📊 Fal.ai Timings: {result['timings']}")
-            
-            logger.info(f"Full result: {result}")
+                logger.info("📊 Fal.ai Timings: %s", result["timings"])
+            logger.debug("Full result: %s", result)
             
             # Map fal.ai output to TrellisOutput schema
             # fal.ai returns: {"model_mesh": {"url": "...", ...}, "timings": {...}}
@@ -137,54 +232,77 @@ class TrellisService:
                     model_mesh = result["model_mesh"]
                     if isinstance(model_mesh, dict) and "url" in model_mesh:
                         output["model_file"] = model_mesh["url"]
-                        logger.info(f"🎯 Model file URL: {output['model_file']}")
+                        logger.info("🎯 Model file URL: %s", output["model_file"])
                     elif isinstance(model_mesh, str):
                         output["model_file"] = model_mesh
-                        logger.info(f"🎯 Model file URL: {output['model_file']}")
+                        logger.info("🎯 Model file URL: %s", output["model_file"])
             
             if not output:
                 raise Exception(f"No valid output received from fal.ai. Result was: {result}")
             
-            logger.info(f"✅ Successfully generated 3D asset in {generation_time:.2f}s: {output}")
+            logger.info("✅ Successfully generated 3D asset in %.2fs: %s", generation_time, output)
+            if cache_ttl > 0:
+                await asyncio.to_thread(redis_service.set_json, cache_key, output, ex=cache_ttl)
             return output
             
         except Exception as e:
-            logger.exception(f"Failed to generate 3D asset: {str(e)}")
+            logger.exception("Failed to generate 3D asset: %s", e)
             raise Exception(f"Failed to generate 3D asset: {str(e)}")
     
-    def _handle_queue_update(self, update):
+    async def _upload_images(self, images: List[str]) -> List[str]:
+        """Upload data-URL images to fal.ai storage concurrently and return their URLs.
+        
+        Remote URLs pass through untouched. An image whose upload fails is sent
+        inline as before, so a storage hiccup doesn't fail the job.
+        """
+        async def upload(image: str) -> str:
+            if not image.startswith("data:"):
+                return image
+            header, b64_data = image.split(",", 1)
+            content_type = header[5:].split(";")[0] or "image/png"
+            return await self._fal.upload(base64.b64decode(b64_data), content_type)
+        
+        results = await asyncio.gather(*(upload(image) for image in images), return_exceptions=True)
+        urls = []
+        for image, result in zip(images, results):
+            if isinstance(result, BaseException):
+                logger.warning("Image upload to fal.ai failed, sending inline: %s", result)
+                urls.append(image)
+            else:
+                urls.append(result)
+        return urls
+    
+    def _handle_queue_update(self, update, progress: _JobProgress):
         """Handle queue status updates and log progress."""
+        fal_client = _fal_client()
+        progress_val = _queue_progress().get(type(update))
         status_msg = None
-        progress_val = None
+        if isinstance(update, fal_client.Queued):
+            logger.info("Queue status: IN_QUEUE (position %s)", update.position)
+            status_msg = "IN_QUEUE"
         
-        if hasattr(update, 'status'):
-            logger.info(f"Queue status: {update.status}")
-            status_msg = update.status
-            
-            # Map Fal.ai statuses to progress percentages
-            if update.status == 'IN_QUEUE':
-                progress_val = 50
-            elif update.status == 'IN_PROGRESS':
-                progress_val = 70
-                
-        if hasattr(update, 'logs') and update.logs:
-            for log in update.logs:
-                if hasattr(log, 'message'):
-                    logger.info(f"  Progress: {log.message}")
-                    status_msg = log.message
-                elif isinstance(log, dict) and 'message' in log:
-                    logger.info(f"  Progress: {log['message']}")
-                    status_msg = log['message']
-                elif isinstance(log, str):
-                    logger.info(f"  Progress: {log}")
-                    status_msg = log
+        # Each status poll returns the job's whole log; only look at entries not seen yet.
+        # fal_client delivers log entries as {"message": ..., "level": ..., ...} dicts.
+        logs = getattr(update, 'logs', None) or []
+        for log in logs[progress.logs_seen:]:
+            if isinstance(log, dict) and 'message' in log:
+                logger.info("  Progress: %s", log['message'])
+                status_msg = log['message']
+        progress.logs_seen = max(progress.logs_seen, len(logs))
         
-        # Call the progress callback if provided
-        if self._progress_callback and status_msg:
-            self._progress_callback(
-                status="generating_model",
-                progress=progress_val or 60,
-                message=f"Trellis: {status_msg}"
-            )
+        # Call the progress callback if provided, only when what it would report changed
+        if progress.callback and status_msg:
+            report = (progress_val or 60, f"Trellis: {status_msg}")
+            if report != progress.last_report:
+                progress.last_report = report
+                progress.callback(
+                    status="generating_model",
+                    progress=report[0],
+                    message=report[1],
+                )
+
 
-trellis_service = TrellisService()
+@lru_cache(maxsize=1)
+def get_trellis_service() -> TrellisService:
+    """Build the Trellis service on first use (configures FAL_KEY) and reuse the instance."""
+    return TrellisService()
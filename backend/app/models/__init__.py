@@ -5,11 +5,18 @@ from .product_state import (  # noqa: F401
     ProductState,
     ProductStatus,
     TrellisArtifacts,
+    claim_product_generation,
     clear_product_state,
+    get_cached_product_status,
     get_product_state,
+    get_product_state_json,
     get_product_status,
+    migrate_legacy_product_state,
+    save_product_snapshot,
+    update_product_state_fields,
     save_product_state,
     save_product_status,
+    LEGACY_PRODUCT_STATE_KEY,
     PRODUCT_STATE_KEY,
     PRODUCT_STATUS_KEY,
 )
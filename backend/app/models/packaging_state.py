@@ -6,16 +6,18 @@ from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
-from app.core.redis import redis_service
+from app.models.state_cache import VersionedStateCache
 
 logger = logging.getLogger(__name__)
 
 PACKAGING_STATE_KEY = "packaging:current"
 
+_UTC = timezone.utc
+
 
 def _utcnow() -> datetime:
     """Return a timezone-aware UTC timestamp."""
-    return datetime.now(timezone.utc)
+    return datetime.now(_UTC)
 
 
 def _default_box_dimensions() -> Dict[str, float]:
@@ -194,14 +196,18 @@ class PackagingState(BaseModel):
             self.cylinder_state.dimensions = _default_cylinder_dimensions()
 
 
+_packaging_state_cache: VersionedStateCache[PackagingState] = VersionedStateCache(
+    PACKAGING_STATE_KEY, PackagingState
+)
+
+
 def get_packaging_state() -> PackagingState:
-    """Fetch the current session state from Redis or return a default object."""
-    payload = redis_service.get_json(PACKAGING_STATE_KEY)
-    if not payload:
+    """Fetch the current session state (cached until its version changes) or a default object."""
+    state = _packaging_state_cache.load()
+    if state is None:
         state = PackagingState()
         state.ensure_valid_dimensions()
         return state
-    state = PackagingState.model_validate(payload)
     state.ensure_valid_dimensions()  # Ensure dimensions are always valid
     return state
 
@@ -209,7 +215,19 @@ def get_packaging_state() -> PackagingState:
 def save_packaging_state(state: PackagingState) -> None:
     """Persist the session state back to Redis."""
     state.updated_at = _utcnow()
-    redis_service.set_json(PACKAGING_STATE_KEY, state.as_json())
+    _packaging_state_cache.store(state)
+
+
+def update_packaging_state_fields(state: PackagingState, *fields: str) -> None:
+    """Persist only the named fields of ``state`` onto the latest stored state.
+
+    For callers that awaited since they read ``state``: the rest of the state is
+    re-read right before the write, so changes made in the meantime are kept.
+    """
+    latest = get_packaging_state()
+    for name in fields:
+        setattr(latest, name, getattr(state, name))
+    save_packaging_state(latest)
 
 
 def clear_packaging_state() -> PackagingState:
@@ -226,7 +244,7 @@ def atomic_save_packaging_state(state: PackagingState) -> bool:
     """
     try:
         state.updated_at = _utcnow()
-        redis_service.set_json(PACKAGING_STATE_KEY, state.as_json())
+        _packaging_state_cache.store(state)
         return True
     except Exception as e:
         logger.error(f"Failed to save packaging state: {e}")
@@ -1,19 +1,35 @@
 from __future__ import annotations
 
+import logging
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 from app.core.redis import redis_service
+from app.models.state_cache import VersionedStateCache
 
-PRODUCT_STATE_KEY = "product:current"
+PRODUCT_STATE_KEY = "product:state"  # Redis hash, one JSON-encoded field per ProductState field
+LEGACY_PRODUCT_STATE_KEY = "product:current"  # Whole-document JSON string used before the hash
 PRODUCT_STATUS_KEY = "product_status:current"
 
+logger = logging.getLogger(__name__)
+
+# How long pollers may share one status read; local writes drop it immediately
+_STATUS_TTL_SECONDS = 0.1
+
+_UTC = timezone.utc
+
 
 def _utcnow() -> datetime:
     """Return a timezone-aware UTC timestamp."""
-    return datetime.now(timezone.utc)
+    return datetime.now(_UTC)
+
+
+def _epoch_ms() -> int:
+    """Return the current Unix time in milliseconds."""
+    return time.time_ns() // 1_000_000
 
 
 class TrellisArtifacts(BaseModel):
@@ -49,7 +65,7 @@ class ProductState(BaseModel):
     status: str = "idle"
     message: Optional[str] = None
     in_progress: bool = False
-    generation_started_at: Optional[datetime] = None  # For timer continuity across reloads
+    generation_started_at_ms: Optional[int] = None  # Unix epoch ms; for timer continuity across reloads
     image_count: int = 3
     images: List[str] = Field(default_factory=list)
     trellis_output: Optional[TrellisArtifacts] = None
@@ -77,7 +93,7 @@ class ProductState(BaseModel):
         self.status = "complete"
         self.message = message
         self.in_progress = False
-        self.generation_started_at = None  # Clear timer on completion
+        self.generation_started_at_ms = None  # Clear timer on completion
         self.updated_at = _utcnow()
 
     def mark_progress(self, status: str, message: Optional[str] = None) -> None:
@@ -97,23 +113,59 @@ class ProductStatus(BaseModel):
     model_file: Optional[str] = None
     preview_image: Optional[str] = None
     updated_at: datetime = Field(default_factory=_utcnow)
+    version: int = 0  # Changes on every save; backs the /product/status ETag
 
     def as_json(self) -> dict:
         return self.model_dump(mode="json")
 
 
+_product_state_cache: VersionedStateCache[ProductState] = VersionedStateCache(
+    PRODUCT_STATE_KEY, ProductState, as_hash=True
+)
+
+
 def get_product_state() -> ProductState:
-    """Fetch the current session state from Redis or return a default object."""
-    payload = redis_service.get_json(PRODUCT_STATE_KEY)
-    if not payload:
+    """Fetch the current session state (cached until its version changes) or a default object."""
+    state = _product_state_cache.load()
+    if state is None:
         return ProductState()
-    return ProductState.model_validate(payload)
+    return state
+
+
+def get_product_state_json() -> str:
+    """Return the current session state as a JSON document, serialized once per version."""
+    payload = _product_state_cache.load_json()
+    if payload is None:
+        return ProductState().model_dump_json()
+    return payload
 
 
 def save_product_state(state: ProductState) -> None:
     """Persist the session state back to Redis."""
     state.updated_at = _utcnow()
-    redis_service.set_json(PRODUCT_STATE_KEY, state.as_json())
+    _product_state_cache.store(state)
+
+
+def migrate_legacy_product_state() -> bool:
+    """Move state saved under the old string key into the hash, once.
+
+    The old document is only copied over when the hash is still empty, so it
+    never overwrites newer state. Returns True if the legacy key was found.
+    """
+    raw_value = redis_service.get(LEGACY_PRODUCT_STATE_KEY)
+    if raw_value is None:
+        return False
+    if not redis_service.hgetall(PRODUCT_STATE_KEY):
+        try:
+            state = ProductState.model_validate_json(raw_value)
+        except ValidationError as exc:
+            logger.warning("Legacy product state at %s is invalid, not migrated: %s", LEGACY_PRODUCT_STATE_KEY, exc)
+            return True
+        _product_state_cache.store(state)
+        logger.info("Migrated product state from %s to %s", LEGACY_PRODUCT_STATE_KEY, PRODUCT_STATE_KEY)
+    redis_service.delete(LEGACY_PRODUCT_STATE_KEY)
+    redis_service.delete(f"{LEGACY_PRODUCT_STATE_KEY}:version")
+    return True
 
 
 def clear_product_state() -> ProductState:
@@ -130,8 +182,88 @@ def get_product_status() -> ProductStatus:
     return ProductStatus.model_validate(payload)
 
 
-def save_product_status(status: ProductStatus) -> None:
+# (monotonic expiry, status) of the last read served to pollers
+_status_cache: Optional[Tuple[float, ProductStatus]] = None
+
+
+def get_cached_product_status() -> ProductStatus:
+    """Return the status, reusing a read made within the last _STATUS_TTL_SECONDS.
+
+    Meant for the /status poll: concurrent pollers share one Redis GET. Status
+    writes from this process drop the cached read, so only writes made by other
+    processes can show up late. Callers must not mutate the result.
+    """
+    global _status_cache
+    now = time.monotonic()
+    cached = _status_cache
+    if cached is not None and now < cached[0]:
+        return cached[1]
+    status = get_product_status()
+    _status_cache = (now + _STATUS_TTL_SECONDS, status)
+    return status
+
+
+def _invalidate_status_cache() -> None:
+    global _status_cache
+    _status_cache = None
+
+
+def _stamp_product_status(status: ProductStatus) -> Dict[str, str]:
+    """Stamp a fresh version on the status and return the values to SET for it.
+
+    The version is generated client-side (a nanosecond clock reading) rather than
+    INCR'd so it travels inside the payload, written in the same round-trip.
+    """
     status.updated_at = _utcnow()
-    redis_service.set_json(PRODUCT_STATUS_KEY, status.as_json())
+    status.version = time.time_ns()
+    return {PRODUCT_STATUS_KEY: status.model_dump_json()}
+
+
+def save_product_status(status: ProductStatus) -> None:
+    redis_service.set_many(_stamp_product_status(status))
+    _invalidate_status_cache()
+
+
+def update_product_state_fields(state: ProductState, *fields: str) -> None:
+    """Persist only the named fields of an already-mutated state (HSET on those fields)."""
+    state.updated_at = _utcnow()
+    _product_state_cache.store_fields(state, (*fields, "updated_at"))
 
 
+def save_product_snapshot(
+    state: ProductState,
+    status: ProductStatus,
+    fields: Optional[Sequence[str]] = None,
+) -> None:
+    """Persist state and status together in a single pipelined round-trip.
+
+    Pass ``fields`` to write only those state fields (plus updated_at) instead
+    of the whole hash.
+    """
+    state.updated_at = _utcnow()
+    status_values = _stamp_product_status(status)
+    if fields is None:
+        _product_state_cache.store(state, status_values)
+    else:
+        _product_state_cache.store_fields(state, (*fields, "updated_at"), status_values)
+    _invalidate_status_cache()
+
+
+def claim_product_generation(
+    state: ProductState,
+    status: ProductStatus,
+    fields: Optional[Sequence[str]] = None,
+) -> bool:
+    """Atomically start a generation unless one is already running.
+
+    Writes the state (or only ``fields`` of it, plus updated_at) and the status
+    payload in one round-trip, but only if the stored state is not
+    ``in_progress``. Returns False, writing nothing, if it is.
+    """
+    state.updated_at = _utcnow()
+    if fields is not None:
+        fields = (*fields, "updated_at")
+    claimed = _product_state_cache.claim(state, "in_progress", fields, _stamp_product_status(status))
+    if claimed:
+        _invalidate_status_cache()
+    return claimed
@@ -0,0 +1,204 @@
+"""In-process cache of parsed state models, invalidated by Redis version counters."""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Generic, Iterable, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+
+    # Hash fields are encoded one by one, where orjson is much faster than json
+    def _dumps_field(value: Any) -> str:
+        return orjson.dumps(value).decode()
+
+    _loads_field = orjson.loads
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    def _dumps_field(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+    _loads_field = json.loads
+
+from app.core.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# (plain key -> value, hash key -> {field: value}) as accepted by RedisService.set_many
+WriteSet = Tuple[Dict[str, str], Dict[str, Dict[str, str]]]
+
+
+class VersionedStateCache(Generic[ModelT]):
+    """Keep the last parsed model for a Redis key, tagged with its version.
+
+    Every write goes through ``store`` which SETs the JSON blob and INCRs
+    ``<key>:version`` in one MULTI. Reads then only need a GET of the small
+    counter to know whether the cached parse is still current; the blob is
+    fetched and validated again only after another writer bumped the version.
+
+    With ``as_hash=True`` the model is kept as a Redis hash with one
+    JSON-encoded field per model field instead, so ``store_fields`` can
+    rewrite just the fields that changed.
+
+    Callers of ``load`` always get a deep copy, so handlers that mutate the
+    returned model before (or without) saving it can't corrupt the cached
+    entry. Handlers that only return it can use ``load_json``, which keeps the
+    serialized entry alongside it.
+    """
+
+    def __init__(self, key: str, model: Type[ModelT], as_hash: bool = False):
+        self.key = key
+        self.version_key = f"{key}:version"
+        self.as_hash = as_hash
+        self._model = model
+        self._entry: Optional[Tuple[int, ModelT]] = None
+        self._json: Optional[Tuple[Tuple[int, ModelT], str]] = None  # (entry it was dumped from, JSON)
+
+    def load(self) -> Optional[ModelT]:
+        """Return the current model, or None when nothing is stored yet."""
+        entry = self._current_entry()
+        if entry is None:
+            return None
+        return entry[1].model_copy(deep=True)
+
+    def load_json(self) -> Optional[str]:
+        """Return the current model serialized as JSON, or None when nothing is stored.
+
+        The serialization is kept with the cached entry, so repeated reads of an
+        unchanged version skip both the copy and the dump.
+        """
+        entry = self._current_entry()
+        if entry is None:
+            return None
+        cached = self._json
+        if cached is not None and cached[0] is entry:
+            return cached[1]
+        payload = entry[1].model_dump_json()
+        self._json = (entry, payload)
+        return payload
+
+    def _current_entry(self) -> Optional[Tuple[int, ModelT]]:
+        """Return the cached (version, model), refetching it if the version moved."""
+        entry = self._entry
+        if entry is None:
+            # Cold cache: fetch counter and payload together in one round-trip
+            raw_version, payload = self._fetch_with_version()
+            version = int(raw_version) if raw_version else 0
+        else:
+            version = redis_service.get_version(self.version_key)
+            if entry[0] == version:
+                return entry
+            payload = redis_service.hgetall(self.key) if self.as_hash else redis_service.get(self.key)
+
+        if not payload:
+            return None
+        model = self._decode(payload)
+        if model is None:
+            return None
+        self._entry = (version, model)
+        return self._entry
+
+    def encode(self, model: ModelT, fields: Optional[Iterable[str]] = None) -> WriteSet:
+        """Build the keys to write for ``model`` (only ``fields`` in hash mode, if given)."""
+        if not self.as_hash:
+            return {self.key: model.model_dump_json()}, {}
+        include = set(fields) if fields is not None else None
+        dumped = model.model_dump(mode="json", include=include)
+        return {}, {self.key: {name: _dumps_field(value) for name, value in dumped.items()}}
+
+    def store(self, model: ModelT, extra_values: Optional[Dict[str, str]] = None) -> None:
+        """Persist the model and remember it under the freshly bumped version.
+
+        ``extra_values`` are SET in the same MULTI (e.g. a companion status payload).
+        """
+        self._write(model, None, extra_values)
+
+    def store_fields(
+        self,
+        model: ModelT,
+        fields: Iterable[str],
+        extra_values: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Persist only ``fields`` of ``model`` (hash mode); otherwise a full store."""
+        if not self.as_hash:
+            fields = None
+        self._write(model, fields, extra_values)
+
+    def _write(
+        self,
+        model: ModelT,
+        fields: Optional[Iterable[str]],
+        extra_values: Optional[Dict[str, str]],
+    ) -> None:
+        previous = self._entry
+        values, hashes = self.encode(model, fields)
+        if extra_values:
+            values.update(extra_values)
+        (version,) = redis_service.set_many(values, [self.version_key], hashes=hashes)
+        self._after_write(model, fields, previous, version)
+
+    def claim(
+        self,
+        model: ModelT,
+        flag_field: str,
+        fields: Optional[Iterable[str]] = None,
+        extra_values: Optional[Dict[str, str]] = None,
+    ) -> bool:
+        """Write the model (or ``fields`` of it) only if the stored ``flag_field`` is not true.
+
+        Check and write happen atomically on the server (hash mode only).
+        Returns False, writing nothing, when the flag was already set.
+        """
+        previous = self._entry
+        _, hashes = self.encode(model, fields)
+        version = redis_service.claim_hash(
+            self.key, flag_field, hashes[self.key], self.version_key, extra_values
+        )
+        if version is None:
+            return False
+        self._after_write(model, fields, previous, version)
+        return True
+
+    def _after_write(
+        self,
+        model: ModelT,
+        fields: Optional[Iterable[str]],
+        previous: Optional[Tuple[int, ModelT]],
+        version: int,
+    ) -> None:
+        if fields is None:
+            self.remember(model, version)
+        elif previous is not None and previous[0] + 1 == version:
+            # Nobody else wrote in between, so the hash is the cached entry plus these
+            # fields (the caller's other fields may be older than the cached entry)
+            self.remember(previous[1].model_copy(update={name: getattr(model, name) for name in fields}), version)
+        else:
+            self._entry = None
+
+    def remember(self, model: ModelT, version: int) -> None:
+        """Record a model the caller already wrote (e.g. as part of a larger MULTI)."""
+        self._entry = (version, model.model_copy(deep=True))
+
+    def _fetch_with_version(self):
+        if self.as_hash:
+            return redis_service.get_and_hgetall(self.version_key, self.key)
+        raw_version, payload = redis_service.mget([self.version_key, self.key])
+        return raw_version, payload
+
+    def _decode(self, payload) -> Optional[ModelT]:
+        try:
+            if self.as_hash:
+                return self._model.model_validate({name: _loads_field(raw) for name, raw in payload.items()})
+            return self._model.model_validate_json(payload)
+        except json.JSONDecodeError:  # also raised by orjson.loads
+            logger.warning("Failed to decode JSON for key %s", self.key)
+            return None
+        except ValidationError as exc:
+            if any(err["type"] == "json_invalid" for err in exc.errors()):
+                logger.warning("Failed to decode JSON for key %s", self.key)
+                return None
+            raise
@@ -3,26 +3,38 @@
 import asyncio
 import json
 import logging
-import time
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Sequence, Tuple
 
-from app.core.config import settings
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    _json_loads = json.loads
+
+from app.core.config import get_settings
 from app.models.product_state import (
     ProductState,
     ProductStatus,
     ProductIteration,
     TrellisArtifacts,
     get_product_state,
-    save_product_state,
+    save_product_snapshot,
     save_product_status,
+    update_product_state_fields,
+    _epoch_ms,
 )
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 FIXTURES_PATH = Path(__file__).parents[2] / "demo_fixtures.json"
 
+# Parsed fixtures keyed by (st_mtime_ns, st_size) so unchanged files aren't re-read
+_fixtures_cache: Optional[Tuple[Tuple[int, int], dict]] = None
+
 TRELLIS_MOCK_PROGRESS = [
     ("Sampling: 21%|██▏       | 3/14", 55),
     ("Sampling: 43%|████▎     | 6/14", 65),
@@ -31,26 +43,52 @@ TRELLIS_MOCK_PROGRESS = [
     ("Sampling: 100%|██████████| 14/14", 92),
 ]
 
+# (fraction of the Trellis phase elapsed, message, progress) per mock step, evenly spaced
+_TRELLIS_MOCK_STEPS = tuple(
+    (i / len(TRELLIS_MOCK_PROGRESS), message, progress)
+    for i, (message, progress) in enumerate(TRELLIS_MOCK_PROGRESS)
+)
+
+# (seconds since start, status, progress, message)
+TimelineStep = Tuple[float, str, int, str]
+
+_UTC = timezone.utc
+
 
 def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
+    return datetime.now(_UTC)
 
 
 def _load_fixtures() -> dict:
-    """Load demo fixtures from file."""
-    if not FIXTURES_PATH.exists():
+    """Load demo fixtures from file, reusing the parsed copy while the file is unchanged.
+
+    The returned dict is shared between runs; treat it as read-only.
+    """
+    global _fixtures_cache
+    try:
+        st = FIXTURES_PATH.stat()
+    except FileNotFoundError:
         logger.error(f"[demo-mock] Fixtures file not found: {FIXTURES_PATH}")
         return {}
+    cache_key = (st.st_mtime_ns, st.st_size)
+    if _fixtures_cache is not None and _fixtures_cache[0] == cache_key:
+        return _fixtures_cache[1]
     try:
-        return json.loads(FIXTURES_PATH.read_text())
-    except json.JSONDecodeError as e:
+        fixtures = _json_loads(FIXTURES_PATH.read_bytes())
+    except json.JSONDecodeError as e:  # also raised by orjson.loads
         logger.error(f"[demo-mock] Invalid fixtures JSON: {e}")
         return {}
+    _fixtures_cache = (cache_key, fixtures)
+    return fixtures
 
 
 class DemoMockPipelineService:
     """Mock pipeline that simulates product generation for demos."""
     
+    def __init__(self) -> None:
+        # Progress updates mutate and re-save this one status instead of building a new one each step
+        self._status = ProductStatus()
+    
     async def run_mock_create(self, prompt: str, image_count: int = 3) -> None:  # noqa: ARG002
         """
         Simulate the create flow with fake loading states.
@@ -78,30 +116,30 @@ class DemoMockPipelineService:
         state.status = "generating_images"
         state.message = "Generating product images..."
         state.in_progress = True
-        state.generation_started_at = _utcnow()
+        state.generation_started_at_ms = _epoch_ms()
         state.last_error = None
-        save_product_state(state)
-        
-        # Phase 1: Generating images (40% of time)
-        self._update_status("generating_images", 10, "Generating product images with AI...")
-        await asyncio.sleep(total_delay * 0.2)
-        
-        self._update_status("generating_images", 25, "Creating multiple views...")
-        await asyncio.sleep(total_delay * 0.2)
-        
-        # Phase 2: Generating 3D model (50% of time)
-        self._update_status("generating_model", 45, "Generating 3D model with Trellis...")
-        await asyncio.sleep(total_delay * 0.2)
-        
-        self._update_status("generating_model", 65, "Processing geometry and textures...")
-        await asyncio.sleep(total_delay * 0.2)
+        update_product_state_fields(
+            state, "prompt", "mode", "status", "message", "in_progress", "generation_started_at_ms", "last_error"
+        )
         
-        self._update_status("generating_model", 85, "Finalizing 3D asset...")
-        await asyncio.sleep(total_delay * 0.2)
+        step = total_delay * 0.2
+        await self._play_timeline(
+            [
+                # Phase 1: Generating images (40% of time)
+                (0.0, "generating_images", 10, "Generating product images with AI..."),
+                (step, "generating_images", 25, "Creating multiple views..."),
+                # Phase 2: Generating 3D model (50% of time)
+                (step * 2, "generating_model", 45, "Generating 3D model with Trellis..."),
+                (step * 3, "generating_model", 65, "Processing geometry and textures..."),
+                (step * 4, "generating_model", 85, "Finalizing 3D asset..."),
+            ],
+            total_delay,
+        )
         
-        # Complete - load fixture data
+        # Complete - load fixture data; one clock reading for the iteration's id and timestamp
+        now = _utcnow()
         iteration = ProductIteration(
-            id=f"demo_create_{int(time.time())}",
+            id=f"demo_create_{int(now.timestamp())}",
             type="create",
             prompt=prompt,
             images=create_data.get("preview_images", []),
@@ -109,7 +147,7 @@ class DemoMockPipelineService:
                 model_file=create_data["model_url"],
                 no_background_images=create_data.get("no_background_images", []),
             ),
-            created_at=_utcnow(),
+            created_at=now,
             duration_seconds=total_delay,
             note="Demo mock generation",
         )
@@ -119,16 +157,18 @@ class DemoMockPipelineService:
         state.status = "complete"
         state.message = "3D asset generated"
         state.in_progress = False
-        state.generation_started_at = None
+        state.generation_started_at_ms = None
         state.images = create_data.get("preview_images", [])
         state.trellis_output = iteration.trellis_output
         state.iterations.append(iteration)
-        save_product_state(state)
-        
-        self._update_status(
-            "complete", 100, "3D asset generated",
-            model_file=create_data["model_url"],
-            preview_image=create_data.get("preview_images", [None])[0]
+        # Final state and status go out together in one write
+        save_product_snapshot(
+            state,
+            self._build_status(
+                "complete", 100, "3D asset generated",
+                model_file=create_data["model_url"],
+                preview_image=create_data.get("preview_images", [None])[0]
+            ),
         )
         
         logger.info("[demo-mock] ✅ Mock create complete!")
@@ -163,27 +203,32 @@ class DemoMockPipelineService:
         state.status = "generating_images"
         state.message = "Analyzing edit request..."
         state.in_progress = True
-        state.generation_started_at = _utcnow()
+        state.generation_started_at_ms = _epoch_ms()
         state.last_error = None
-        save_product_state(state)
-        
-        # Phase 1: Analyzing and generating edited images (40% of time)
-        self._update_status("generating_images", 15, "Analyzing edit request...")
-        await asyncio.sleep(total_delay * 0.15)
-        
-        self._update_status("generating_images", 30, "Generating edited product images...")
-        await asyncio.sleep(total_delay * 0.25)
+        update_product_state_fields(
+            state, "latest_instruction", "mode", "status", "message", "in_progress", "generation_started_at_ms", "last_error"
+        )
         
-        # Phase 2: Generating edited 3D model (remaining time)
-        trellis_duration = max(total_delay - (total_delay * 0.4), 0.3)
-        per_step_delay = trellis_duration / len(TRELLIS_MOCK_PROGRESS)
-        for message, progress in TRELLIS_MOCK_PROGRESS:
-            self._update_status("generating_model", progress, message)
-            await asyncio.sleep(per_step_delay)
+        # Phase 2 (generating the edited 3D model) takes the remaining time
+        trellis_start = total_delay * 0.4
+        trellis_duration = max(total_delay - trellis_start, 0.3)
+        await self._play_timeline(
+            [
+                # Phase 1: Analyzing and generating edited images (40% of time)
+                (0.0, "generating_images", 15, "Analyzing edit request..."),
+                (total_delay * 0.15, "generating_images", 30, "Generating edited product images..."),
+                *(
+                    (trellis_start + fraction * trellis_duration, "generating_model", progress, message)
+                    for fraction, message, progress in _TRELLIS_MOCK_STEPS
+                ),
+            ],
+            trellis_start + trellis_duration,
+        )
         
-        # Complete - load fixture data
+        # Complete - load fixture data; one clock reading for the iteration's id and timestamp
+        now = _utcnow()
         iteration = ProductIteration(
-            id=f"demo_edit_{int(time.time())}",
+            id=f"demo_edit_{int(now.timestamp())}",
             type="edit",
             prompt=prompt,
             images=edit_data.get("preview_images", []),
@@ -191,7 +236,7 @@ class DemoMockPipelineService:
                 model_file=edit_data["model_url"],
                 no_background_images=edit_data.get("no_background_images", []),
             ),
-            created_at=_utcnow(),
+            created_at=now,
             duration_seconds=total_delay,
             note="Demo mock edit",
         )
@@ -202,20 +247,39 @@ class DemoMockPipelineService:
         state.status = "complete"
         state.message = "Edit complete"
         state.in_progress = False
-        state.generation_started_at = None
+        state.generation_started_at_ms = None
         state.images = edit_data.get("preview_images", [])
         state.trellis_output = iteration.trellis_output
         state.iterations.append(iteration)
-        save_product_state(state)
-        
-        self._update_status(
-            "complete", 100, "Edit complete",
-            model_file=edit_data["model_url"],
-            preview_image=edit_data.get("preview_images", [None])[0]
+        # Final state and status go out together in one write
+        save_product_snapshot(
+            state,
+            self._build_status(
+                "complete", 100, "Edit complete",
+                model_file=edit_data["model_url"],
+                preview_image=edit_data.get("preview_images", [None])[0]
+            ),
         )
         
         logger.info("[demo-mock] ✅ Mock edit complete!")
     
+    async def _play_timeline(self, steps: Sequence[TimelineStep], end: float) -> None:
+        """Publish each status at its offset from the start, then wait until ``end``.
+
+        Sleeps target absolute offsets on the loop clock, so time spent writing
+        status doesn't accumulate as drift; a step identical to the previous
+        one is not rewritten.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        last = None
+        for offset, status, progress, message in steps:
+            await asyncio.sleep(max(0.0, start + offset - loop.time()))
+            if (status, progress, message) != last:
+                self._update_status(status, progress, message)
+                last = (status, progress, message)
+        await asyncio.sleep(max(0.0, start + end - loop.time()))
+    
     def _update_status(
         self,
         status: str,
@@ -225,15 +289,31 @@ class DemoMockPipelineService:
         preview_image: Optional[str] = None,
     ) -> None:
         """Update the product status for frontend polling."""
-        status_obj = ProductStatus(
+        logger.info(f"[demo-mock] Status: {status} ({progress}%) - {message}")
+        current = self._status
+        current.status = status
+        current.progress = progress
+        current.message = message
+        current.model_file = model_file
+        current.preview_image = preview_image
+        save_product_status(current)
+    
+    @staticmethod
+    def _build_status(
+        status: str,
+        progress: int,
+        message: str,
+        model_file: Optional[str] = None,
+        preview_image: Optional[str] = None,
+    ) -> ProductStatus:
+        logger.info(f"[demo-mock] Status: {status} ({progress}%) - {message}")
+        return ProductStatus(
             status=status,
             progress=progress,
             message=message,
             model_file=model_file,
             preview_image=preview_image,
         )
-        save_product_status(status_obj)
-        logger.info(f"[demo-mock] Status: {status} ({progress}%) - {message}")
 
 
 demo_mock_pipeline = DemoMockPipelineService()
@@ -1,56 +1,248 @@
 """File export service for generating various file formats from product and packaging data."""
 
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
 import logging
 import math
 import os
+import shutil
+import struct
 import tempfile
 import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, TypeVar
 
-import trimesh
-from PIL import Image
-import cairosvg
-import io
+import numpy as np
 
+from app.core.config import get_settings
 from app.models.packaging_state import PackagingState
 from app.models.product_state import ProductState
 
+# trimesh, Pillow, cairosvg (and the optional pyvips/pyrender) are imported where they are
+# used, so importing this module - e.g. just to look up an export path - stays cheap.
+if TYPE_CHECKING:
+    import trimesh
+    from cairosvg.parser import Tree as SvgTree
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Started/stopped by the app lifespan; exports fall back to a thread while it is unset
+_export_pool: Optional[ProcessPoolExecutor] = None
+# Per-process threads for writing one export's files concurrently (see _writer_executor)
+_writer_pool: Optional[ThreadPoolExecutor] = None
 
 # Directory for storing exported files temporarily
 EXPORT_DIR = Path(tempfile.gettempdir()) / "hw12_exports"
 EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Downloaded source models, keyed by SHA-256 of their URL (Trellis URLs are immutable)
+GLB_CACHE_DIR = EXPORT_DIR / "_glb_cache"
+GLB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+GLB_CACHE_MAX_FILES = 16
+
+
+def _glb_cache_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _download_glb(url: str) -> Path:
+    """Download a GLB file into the on-disk cache (once per URL) and return its path."""
+    cache_path = GLB_CACHE_DIR / f"{_glb_cache_key(url)}.glb"
+    if cache_path.exists():
+        os.utime(cache_path)  # Mark as recently used for _prune_glb_cache
+        logger.info(f"[file-export] Using cached GLB for {url[:80]}")
+        return cache_path
 
-def _download_glb(url: str) -> bytes:
-    """Download GLB file from URL."""
     logger.info(f"[file-export] Downloading GLB from {url[:80]}...")
-    with urllib.request.urlopen(url) as response:
-        return response.read()
+    # Stream into a temp file and rename, so concurrent exports never see a partial GLB
+    fd, tmp_name = tempfile.mkstemp(dir=GLB_CACHE_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out, urllib.request.urlopen(url) as response:
+            shutil.copyfileobj(response, out, length=1 << 20)
+        os.replace(tmp_name, cache_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _prune_glb_cache()
+    return cache_path
 
 
-def _load_glb_mesh(glb_data: bytes) -> trimesh.Scene:
-    """Load GLB data into trimesh Scene."""
-    return trimesh.load(io.BytesIO(glb_data), file_type="glb")
+def _prune_glb_cache() -> None:
+    """Drop the least recently used GLBs beyond GLB_CACHE_MAX_FILES."""
+    entries = []
+    for path in GLB_CACHE_DIR.glob("*.glb"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    for _, path in entries[GLB_CACHE_MAX_FILES:]:
+        path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=4)
+def _load_glb_mesh_cached(cache_key: str) -> trimesh.Scene:
+    """Load a cached GLB into a trimesh Scene, reusing the parse for repeat exports.
+
+    The returned Scene is shared between calls; treat it as read-only.
+    """
+    return _load_glb_mesh(GLB_CACHE_DIR / f"{cache_key}.glb")
+
 
+def _load_glb_mesh(glb_path: Path) -> trimesh.Scene:
+    """Load a GLB file into trimesh Scene, reading it from disk rather than a bytes copy."""
+    import trimesh
 
-def _export_stl(mesh: trimesh.Scene, output_path: Path) -> None:
+    # Trellis GLBs are already clean; skip the vertex merge/validation pass on load
+    return trimesh.load(str(glb_path), file_type="glb", process=False)
+
+
+def _combine_scene(scene: trimesh.Scene) -> trimesh.Trimesh:
+    """Concatenate every mesh in the scene into one Trimesh (once per export)."""
+    import trimesh
+
+    return trimesh.util.concatenate([m for m in scene.geometry.values() if isinstance(m, trimesh.Trimesh)])
+
+
+# Binary STL triangle record: normal, three vertices, attribute byte count
+_STL_RECORD = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+
+
+def _write_binary_stl(mesh: trimesh.Trimesh, output_path: Path) -> None:
+    """Write a binary STL in one vectorized pass and a single write."""
+    triangles = mesh.vertices[mesh.faces]
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    # Degenerate faces get a zero normal rather than NaN
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+
+    records = np.zeros(len(triangles), dtype=_STL_RECORD)
+    records["normal"] = normals
+    records["vertices"] = triangles
+    output_path.write_bytes(b"\0" * 80 + struct.pack("<I", len(records)) + records.tobytes())
+
+
+def _export_stl(mesh: trimesh.Trimesh, output_path: Path) -> None:
     """Export mesh to STL format."""
-    # Combine all meshes in the scene
-    combined = trimesh.util.concatenate([m for m in mesh.geometry.values() if isinstance(m, trimesh.Trimesh)])
-    combined.export(str(output_path), file_type="stl")
+    _write_binary_stl(mesh, output_path)
     logger.info(f"[file-export] Exported STL to {output_path}")
 
 
-def _export_obj(mesh: trimesh.Scene, output_path: Path) -> None:
+def _write_obj_geometry(mesh: trimesh.Trimesh, output_path: Path) -> None:
+    """Write bare ``v``/``f`` OBJ records with batched numpy formatting."""
+    with open(output_path, "wb") as f:
+        np.savetxt(f, mesh.vertices, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, mesh.faces + 1, fmt="f %d %d %d")  # OBJ indices are 1-based
+
+
+def _export_obj(mesh: trimesh.Trimesh, output_path: Path) -> None:
     """Export mesh to OBJ format (can be imported into Blender)."""
-    mesh.export(str(output_path), file_type="obj")
+    if getattr(mesh.visual, "kind", None) is None:
+        _write_obj_geometry(mesh, output_path)
+    else:
+        # Keep trimesh's exporter for UVs/materials and vertex or face colours (Trellis models)
+        mesh.export(str(output_path), file_type="obj")
     logger.info(f"[file-export] Exported OBJ to {output_path}")
 
 
-def _render_jpg(scene: trimesh.Scene, output_path: Path, resolution: Tuple[int, int] = (2048, 2048)) -> None:
-    """Render scene to JPG image."""
+@lru_cache(maxsize=1)
+def _import_pyvips():
+    """Import pyvips (faster JPEG encoding), or return None if it or libvips is missing."""
+    try:
+        import pyvips
+    except (ImportError, OSError):  # OSError: binding installed but libvips missing
+        return None
+    return pyvips
+
+
+@lru_cache(maxsize=1)
+def _import_pyrender():
+    """Import pyrender for headless rendering, or return None if it isn't installed."""
+    # EGL renders without an X display; respect an explicit choice (e.g. osmesa)
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    try:
+        import pyrender
+    except ImportError:
+        logger.info("[file-export] pyrender not available, using alternative rendering")
+        return None
+    return pyrender
+
+
+def _look_at(eye: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Camera pose (4x4) at ``eye`` looking at ``target`` with +Y up (OpenGL convention)."""
+    z_axis = eye - target
+    z_axis /= np.linalg.norm(z_axis)
+    x_axis = np.cross([0.0, 1.0, 0.0], z_axis)
+    x_axis /= np.linalg.norm(x_axis)
+    pose = np.eye(4)
+    pose[:3, 0] = x_axis
+    pose[:3, 1] = np.cross(z_axis, x_axis)
+    pose[:3, 2] = z_axis
+    pose[:3, 3] = eye
+    return pose
+
+
+def _render_offscreen(pyrender, scene: trimesh.Scene, resolution: Tuple[int, int], bounds: np.ndarray) -> np.ndarray:
+    """Rasterize the scene with pyrender's offscreen renderer; returns an RGB array."""
+    render_scene = pyrender.Scene.from_trimesh_scene(scene, bg_color=[240, 240, 240, 255], ambient_light=[0.3] * 3)
+
+    # Frame the bounding sphere from the front-right, slightly above
+    yfov = math.pi / 4
+    center = (bounds[0] + bounds[1]) / 2
+    radius = max(np.linalg.norm(bounds[1] - bounds[0]) / 2, 1e-6)
+    direction = np.array([0.6, 0.5, 1.0])
+    eye = center + direction / np.linalg.norm(direction) * (radius / math.sin(yfov / 2))
+    pose = _look_at(eye, center)
+    render_scene.add(pyrender.PerspectiveCamera(yfov=yfov, aspectRatio=resolution[0] / resolution[1]), pose=pose)
+    render_scene.add(pyrender.DirectionalLight(intensity=3.0), pose=pose)
+
+    renderer = pyrender.OffscreenRenderer(*resolution)
+    try:
+        color, _ = renderer.render(render_scene)
+    finally:
+        renderer.delete()
+    return color
+
+
+def _rgb_to_jpg(rgb: np.ndarray, output_path: Path) -> None:
+    """Write an RGB uint8 array as a quality-95 JPEG."""
+    pyvips = _import_pyvips()
+    if pyvips is not None:
+        pyvips.Image.new_from_array(rgb).jpegsave(str(output_path), Q=95, strip=True)
+        return
+    from PIL import Image
+
+    Image.fromarray(rgb).save(output_path, "JPEG", quality=95)
+
+
+def _mesh_bounds(scene: trimesh.Scene) -> np.ndarray:
+    """(min, max) corners over every mesh vertex in one min/max pass.
+
+    Like _combine_scene, this reads the geometry in its own coordinates.
+    """
+    vertices = np.concatenate([g.vertices for g in scene.geometry.values() if len(getattr(g, "vertices", ()))])
+    return np.array([vertices.min(axis=0), vertices.max(axis=0)])
+
+
+def _render_jpg(
+    scene: trimesh.Scene,
+    output_path: Path,
+    resolution: Tuple[int, int] = (2048, 2048),
+    bounds: Optional[np.ndarray] = None,
+) -> None:
+    """Render scene to JPG image.
+
+    ``bounds`` lets callers that already combined the scene's meshes skip
+    recomputing the bounds used to frame the camera.
+    """
     try:
         # Check if scene has geometry
         if not scene.geometry:
@@ -58,22 +250,14 @@ def _render_jpg(scene: trimesh.Scene, output_path: Path, resolution: Tuple[int,
             _create_placeholder_image(output_path, resolution, "No geometry")
             return
 
-        # Try to render the scene using trimesh (requires pyglet)
-        try:
-            png_data = scene.save_image(resolution=resolution)
-
-            if png_data and len(png_data) > 0:
-                # Convert PNG to JPG
-                img = Image.open(io.BytesIO(png_data))
-                rgb_img = img.convert("RGB")
-                rgb_img.save(output_path, "JPEG", quality=95)
-                logger.info(f"[file-export] Rendered JPG to {output_path}")
-                return
-        except ImportError as e:
-            if "pyglet" in str(e):
-                logger.info(f"[file-export] pyglet not available, using alternative rendering")
-            else:
-                raise
+        # Render the real geometry offscreen (no display needed) when pyrender is installed
+        pyrender = _import_pyrender()
+        if pyrender is not None:
+            if bounds is None:
+                bounds = _mesh_bounds(scene)
+            _rgb_to_jpg(_render_offscreen(pyrender, scene, resolution, bounds), output_path)
+            logger.info(f"[file-export] Rendered JPG to {output_path}")
+            return
 
         # Fallback: create a simple 2D representation
         _create_scene_thumbnail(scene, output_path, resolution)
@@ -85,18 +269,13 @@ def _render_jpg(scene: trimesh.Scene, output_path: Path, resolution: Tuple[int,
 
 def _create_scene_thumbnail(scene: trimesh.Scene, output_path: Path, resolution: Tuple[int, int]) -> None:
     """Create a simple 2D thumbnail representation of the 3D scene."""
-    from PIL import ImageDraw
+    from PIL import Image, ImageDraw
 
     img = Image.new("RGB", resolution, color=(240, 240, 240))
     draw = ImageDraw.Draw(img)
 
-    # Get scene bounds
-    bounds = scene.bounds
-    if bounds is not None:
-        center = (bounds[0] + bounds[1]) / 2
-        size = bounds[1] - bounds[0]
-        max_dim = max(size)
-
+    # The box is schematic (it doesn't depend on the scene's extent), so no bounds are needed
+    if scene.geometry:
         # Draw a simple wireframe box representing the scene bounds
         box_center = (resolution[0] // 2, resolution[1] // 2)
         box_size = min(resolution) // 4
@@ -132,7 +311,7 @@ def _create_scene_thumbnail(scene: trimesh.Scene, output_path: Path, resolution:
 
 def _create_placeholder_image(output_path: Path, resolution: Tuple[int, int], message: str) -> None:
     """Create a placeholder image with a message."""
-    from PIL import ImageDraw
+    from PIL import Image, ImageDraw
 
     img = Image.new("RGB", resolution, color=(200, 200, 200))
     draw = ImageDraw.Draw(img)
@@ -156,19 +335,92 @@ def _create_placeholder_image(output_path: Path, resolution: Tuple[int, int], me
 
 def _create_box_mesh(dimensions: Dict[str, float]) -> trimesh.Trimesh:
     """Create a box mesh from dimensions (in mm)."""
-    width = dimensions.get("width", 100.0) / 1000.0  # Convert mm to meters
-    height = dimensions.get("height", 150.0) / 1000.0
-    depth = dimensions.get("depth", 100.0) / 1000.0
-    
-    return trimesh.creation.box(extents=[width, height, depth])
+    return _box_mesh_cached(
+        round(dimensions.get("width", 100.0), 1),
+        round(dimensions.get("height", 150.0), 1),
+        round(dimensions.get("depth", 100.0), 1),
+    ).copy()
 
 
 def _create_cylinder_mesh(dimensions: Dict[str, float]) -> trimesh.Trimesh:
     """Create a cylinder mesh from dimensions (in mm)."""
-    radius = (dimensions.get("width", 80.0) / 1000.0) / 2.0  # Convert mm to meters, then radius
-    height = dimensions.get("height", 150.0) / 1000.0
-    
-    return trimesh.creation.cylinder(radius=radius, height=height, sections=32)
+    return _cylinder_mesh_cached(
+        round(dimensions.get("width", 80.0), 1),
+        round(dimensions.get("height", 150.0), 1),
+    ).copy()
+
+
+# Keyed on dimensions rounded to 0.1 mm; callers get a copy so the cached mesh is never mutated
+@lru_cache(maxsize=128)
+def _box_mesh_cached(width_mm: float, height_mm: float, depth_mm: float) -> trimesh.Trimesh:
+    import trimesh
+
+    # Convert mm to meters
+    return trimesh.creation.box(extents=[width_mm / 1000.0, height_mm / 1000.0, depth_mm / 1000.0])
+
+
+@lru_cache(maxsize=128)
+def _cylinder_mesh_cached(width_mm: float, height_mm: float) -> trimesh.Trimesh:
+    import trimesh
+
+    radius = (width_mm / 1000.0) / 2.0  # Convert mm to meters, then radius
+    vertices = _UNIT_CYLINDER_VERTICES * (radius, radius, height_mm / 1000.0)
+    # The topology is known-good, so skip trimesh's merge/validation pass
+    return trimesh.Trimesh(vertices, _UNIT_CYLINDER_FACES, process=False)
+
+
+def _build_unit_cylinder(sections: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Vertices and faces of a radius-1, height-1 cylinder along Z centred on the origin.
+
+    Same layout as trimesh.creation.cylinder: outward-facing side quads plus a
+    triangle fan on each cap.
+    """
+    angles = np.arange(sections) * (2 * math.pi / sections)
+    ring = np.column_stack((np.cos(angles), np.sin(angles)))
+    vertices = np.vstack((
+        np.column_stack((ring, np.full(sections, -0.5))),  # bottom ring: 0 .. n-1
+        np.column_stack((ring, np.full(sections, 0.5))),  # top ring: n .. 2n-1
+        [[0.0, 0.0, -0.5], [0.0, 0.0, 0.5]],  # cap centres: 2n, 2n+1
+    ))
+
+    i = np.arange(sections)
+    j = (i + 1) % sections
+    bottom_center = np.full(sections, 2 * sections)
+    top_center = bottom_center + 1
+    faces = np.vstack((
+        np.column_stack((i, j, j + sections)),
+        np.column_stack((i, j + sections, i + sections)),
+        np.column_stack((top_center, i + sections, j + sections)),
+        np.column_stack((bottom_center, j, i)),
+    ))
+    return vertices, faces
+
+
+_UNIT_CYLINDER_VERTICES, _UNIT_CYLINDER_FACES = _build_unit_cylinder(32)
+
+
+def _fmt(value: float) -> str:
+    """Format an SVG coordinate to 0.01 mm without trailing zeros (220.00000000000003 -> "220")."""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _rect_path(x: float, y: float, w: float, h: float) -> str:
+    """SVG path data for an axis-aligned rectangle."""
+    x0, y0, x1, y1 = _fmt(x), _fmt(y), _fmt(x + w), _fmt(y + h)
+    return f"M {x0} {y0} L {x1} {y0} L {x1} {y1} L {x0} {y1} Z"
+
+
+# Unit-circle octagon corners, shared by every cylinder lid
+_OCTAGON = tuple((math.cos(i * math.tau / 8), math.sin(i * math.tau / 8)) for i in range(8))
+
+
+def _octagon_path(cx: float, cy: float, r: float) -> str:
+    """SVG path data for a circle of radius r approximated with an octagon."""
+    return "M " + " L ".join(f"{_fmt(cx + c * r)} {_fmt(cy + s * r)}" for c, s in _OCTAGON) + " Z"
+
+
+def _svg_path(d: str, stroke: str) -> str:
+    return f'<path d="{d}" fill="none" stroke="{stroke}" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>'
 
 
 def _generate_dieline_svg(packaging_state: PackagingState) -> str:
@@ -177,79 +429,34 @@ def _generate_dieline_svg(packaging_state: PackagingState) -> str:
     shape_state = packaging_state.cylinder_state if package_type == "cylinder" else packaging_state.box_state
     dimensions = shape_state.dimensions
     
-    paths = []
-    
     if package_type == "box":
         width = dimensions.get("width", 100.0)
         height = dimensions.get("height", 150.0)
         depth = dimensions.get("depth", 100.0)
         
         margin = 20.0
+        left = margin + depth  # x of the front panel
+        top = margin + depth  # y of the side panels
         
-        # Top panel (above front)
-        top_points = [
-            (margin + depth, margin),
-            (margin + depth + width, margin),
-            (margin + depth + width, margin + depth),
-            (margin + depth, margin + depth),
-        ]
-        top_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in top_points for p in pair])
-        paths.append(f'<path d="{top_path}" fill="none" stroke="#94a3b8" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Left panel
-        left_points = [
-            (margin, margin + depth),
-            (margin + depth, margin + depth),
-            (margin + depth, margin + depth + height),
-            (margin, margin + depth + height),
+        paths = [
+            # Top panel (above front)
+            _svg_path(_rect_path(left, margin, width, depth), "#94a3b8"),
+            # Left panel
+            _svg_path(_rect_path(margin, top, depth, height), "#10b981"),
+            # Front panel (center)
+            _svg_path(_rect_path(left, top, width, height), "#10b981"),
+            # Right panel
+            _svg_path(_rect_path(left + width, top, depth, height), "#10b981"),
+            # Back panel
+            _svg_path(_rect_path(left + width + depth, top, width, height), "#94a3b8"),
+            # Bottom panel (below front)
+            _svg_path(_rect_path(left, top + height, width, depth), "#94a3b8"),
         ]
-        left_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in left_points for p in pair])
-        paths.append(f'<path d="{left_path}" fill="none" stroke="#10b981" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Front panel (center)
-        front_points = [
-            (margin + depth, margin + depth),
-            (margin + depth + width, margin + depth),
-            (margin + depth + width, margin + depth + height),
-            (margin + depth, margin + depth + height),
-        ]
-        front_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in front_points for p in pair])
-        paths.append(f'<path d="{front_path}" fill="none" stroke="#10b981" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Right panel
-        right_points = [
-            (margin + depth + width, margin + depth),
-            (margin + depth + width + depth, margin + depth),
-            (margin + depth + width + depth, margin + depth + height),
-            (margin + depth + width, margin + depth + height),
-        ]
-        right_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in right_points for p in pair])
-        paths.append(f'<path d="{right_path}" fill="none" stroke="#10b981" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Back panel
-        back_points = [
-            (margin + depth + width + depth, margin + depth),
-            (margin + depth + width + depth + width, margin + depth),
-            (margin + depth + width + depth + width, margin + depth + height),
-            (margin + depth + width + depth, margin + depth + height),
-        ]
-        back_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in back_points for p in pair])
-        paths.append(f'<path d="{back_path}" fill="none" stroke="#94a3b8" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Bottom panel (below front)
-        bottom_points = [
-            (margin + depth, margin + depth + height),
-            (margin + depth + width, margin + depth + height),
-            (margin + depth + width, margin + depth + height + depth),
-            (margin + depth, margin + depth + height + depth),
-        ]
-        bottom_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in bottom_points for p in pair])
-        paths.append(f'<path d="{bottom_path}" fill="none" stroke="#94a3b8" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
         
         # Calculate bounds
         max_x = margin + depth + width + depth + width
         max_y = margin + depth + height + depth
-        view_box = f"0 0 {max_x + margin} {max_y + margin}"
+        view_box = f"0 0 {_fmt(max_x + margin)} {_fmt(max_y + margin)}"
         
     else:  # cylinder
         width = dimensions.get("width", 80.0)
@@ -257,53 +464,23 @@ def _generate_dieline_svg(packaging_state: PackagingState) -> str:
         
         margin = 10.0
         circumference = math.pi * width
+        radius = width / 2
+        center_x = margin + circumference / 2
+        bottom_center_y = margin + radius + height + radius
         
-        # Body wrap
-        body_points = [
-            (margin, margin + width / 2),
-            (margin + circumference, margin + width / 2),
-            (margin + circumference, margin + width / 2 + height),
-            (margin, margin + width / 2 + height),
+        paths = [
+            # Body wrap
+            _svg_path(_rect_path(margin, margin + radius, circumference, height), "#10b981"),
+            # Top circle (approximated with octagon)
+            _svg_path(_octagon_path(center_x, margin, radius), "#10b981"),
+            # Bottom circle
+            _svg_path(_octagon_path(center_x, bottom_center_y, radius), "#94a3b8"),
         ]
-        body_path = "M {} {} L {} {} L {} {} L {} {} Z".format(*[p for pair in body_points for p in pair])
-        paths.append(f'<path d="{body_path}" fill="none" stroke="#10b981" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Top circle (approximated with octagon)
-        top_center_x = margin + circumference / 2
-        top_center_y = margin
-        top_circle_points = []
-        for i in range(8):
-            angle = (i * math.pi * 2) / 8
-            x = top_center_x + math.cos(angle) * (width / 2)
-            y = top_center_y + math.sin(angle) * (width / 2)
-            top_circle_points.append((x, y))
-        
-        top_circle_path = "M {} {}".format(*top_circle_points[0])
-        for point in top_circle_points[1:]:
-            top_circle_path += f" L {point[0]} {point[1]}"
-        top_circle_path += " Z"
-        paths.append(f'<path d="{top_circle_path}" fill="none" stroke="#10b981" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
-        
-        # Bottom circle
-        bottom_center_x = margin + circumference / 2
-        bottom_center_y = margin + width / 2 + height + width / 2
-        bottom_circle_points = []
-        for i in range(8):
-            angle = (i * math.pi * 2) / 8
-            x = bottom_center_x + math.cos(angle) * (width / 2)
-            y = bottom_center_y + math.sin(angle) * (width / 2)
-            bottom_circle_points.append((x, y))
-        
-        bottom_circle_path = "M {} {}".format(*bottom_circle_points[0])
-        for point in bottom_circle_points[1:]:
-            bottom_circle_path += f" L {point[0]} {point[1]}"
-        bottom_circle_path += " Z"
-        paths.append(f'<path d="{bottom_circle_path}" fill="none" stroke="#94a3b8" stroke-width="1" stroke-linecap="round" stroke-linejoin="round"/>')
         
         # Calculate bounds
         max_x = margin + circumference
-        max_y = bottom_center_y + width / 2
-        view_box = f"0 0 {max_x + margin} {max_y + margin}"
+        max_y = bottom_center_y + radius
+        view_box = f"0 0 {_fmt(max_x + margin)} {_fmt(max_y + margin)}"
     
     svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <svg width="800" height="600" viewBox="{view_box}" xmlns="http://www.w3.org/2000/svg">
@@ -313,6 +490,45 @@ def _generate_dieline_svg(packaging_state: PackagingState) -> str:
     return svg_content
 
 
+def _writer_executor() -> ThreadPoolExecutor:
+    """Threads for writing export files side by side, created once per (worker) process."""
+    global _writer_pool
+    if _writer_pool is None:
+        _writer_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="file-export")
+    return _writer_pool
+
+
+def _export_mesh_formats(mesh: trimesh.Trimesh, scene: trimesh.Scene, base_path: Path) -> Dict[str, Path]:
+    """Write STL, OBJ and JPG for one mesh; returns dict mapping format -> file path.
+
+    The STL and OBJ writers run on the writer threads while the JPG renders on
+    the calling thread, which keeps pyrender's OffscreenRenderer GL context on
+    the thread that created it.
+    """
+    stl_path = base_path.with_suffix(".stl")
+    obj_path = base_path.with_suffix(".obj")  # For Blender import - note: not .blend but importable
+    jpg_path = base_path.with_suffix(".jpg")
+    
+    bounds = mesh.bounds  # Computed before the STL thread shares the mesh
+    executor = _writer_executor()
+    pending = [
+        # Only reads the raw vertex/face arrays, so it can share the mesh with the renderer
+        executor.submit(_export_stl, mesh, stl_path),
+        # trimesh's OBJ exporter fills lazy caches (normals, visuals) that the renderer
+        # also fills, and those aren't safe to race, so it gets its own copy
+        executor.submit(_export_obj, mesh.copy(), obj_path),
+    ]
+    _render_jpg(scene, jpg_path, bounds=bounds)
+    for future in pending:
+        future.result()
+    
+    return {
+        "stl": stl_path,
+        "blend": obj_path,  # Store as "blend" but it's OBJ format
+        "jpg": jpg_path,
+    }
+
+
 def export_product_formats(product_state: ProductState, session_id: str) -> Dict[str, Path]:
     """Generate product export files: blend (as OBJ), stl, jpg.
     
@@ -321,29 +537,12 @@ def export_product_formats(product_state: ProductState, session_id: str) -> Dict
     if not product_state.trellis_output or not product_state.trellis_output.model_file:
         raise ValueError("No product model available for export")
     
-    glb_url = product_state.trellis_output.model_file
-    glb_data = _download_glb(glb_url)
-    mesh = _load_glb_mesh(glb_data)
-    
-    export_files = {}
-    base_path = EXPORT_DIR / f"product_{session_id}"
-    
-    # Export STL
-    stl_path = base_path.with_suffix(".stl")
-    _export_stl(mesh, stl_path)
-    export_files["stl"] = stl_path
+    glb_path = _download_glb(product_state.trellis_output.model_file)
+    scene = _load_glb_mesh_cached(glb_path.stem)
+    # One concatenated mesh feeds both mesh formats and the thumbnail bounds
+    combined = _combine_scene(scene)
     
-    # Export OBJ (for Blender import - note: not .blend but importable)
-    obj_path = base_path.with_suffix(".obj")
-    _export_obj(mesh, obj_path)
-    export_files["blend"] = obj_path  # Store as "blend" but it's OBJ format
-    
-    # Export JPG
-    jpg_path = base_path.with_suffix(".jpg")
-    _render_jpg(mesh, jpg_path)
-    export_files["jpg"] = jpg_path
-    
-    return export_files
+    return _export_mesh_formats(combined, scene, EXPORT_DIR / f"product_{session_id}")
 
 
 def export_package_formats(packaging_state: PackagingState, session_id: str) -> Dict[str, Path]:
@@ -361,28 +560,28 @@ def export_package_formats(packaging_state: PackagingState, session_id: str) ->
     else:  # cylinder
         mesh = _create_cylinder_mesh(dimensions)
     
-    # Convert to Scene for consistency
+    import trimesh
+
+    # The mesh formats take the single mesh directly; rendering needs a Scene
     scene = trimesh.Scene([mesh])
     
-    export_files = {}
-    base_path = EXPORT_DIR / f"package_{session_id}"
-    
-    # Export STL
-    stl_path = base_path.with_suffix(".stl")
-    _export_stl(scene, stl_path)
-    export_files["stl"] = stl_path
-    
-    # Export OBJ (for Blender import)
-    obj_path = base_path.with_suffix(".obj")
-    _export_obj(scene, obj_path)
-    export_files["blend"] = obj_path  # Store as "blend" but it's OBJ format
-    
-    # Export JPG
-    jpg_path = base_path.with_suffix(".jpg")
-    _render_jpg(scene, jpg_path)
-    export_files["jpg"] = jpg_path
-    
-    return export_files
+    return _export_mesh_formats(mesh, scene, EXPORT_DIR / f"package_{session_id}")
+
+
+def _rasterize_svg(svg_tree: SvgTree) -> np.ndarray:
+    """Rasterize a parsed SVG at 96 DPI to an RGB array.
+
+    Goes through cairosvg's PNG output, whose colour is unpremultiplied; alpha is
+    then dropped like PIL's convert("RGB") (transparent areas come out black).
+    """
+    from PIL import Image
+    from cairosvg.surface import PNGSurface
+
+    png = io.BytesIO()
+    PNGSurface(svg_tree, png, 96).finish()
+    png.seek(0)
+    with Image.open(png) as image:
+        return np.asarray(image.convert("RGB"))
 
 
 def export_dieline_formats(packaging_state: PackagingState, session_id: str) -> Dict[str, Path]:
@@ -400,10 +599,16 @@ def export_dieline_formats(packaging_state: PackagingState, session_id: str) ->
     svg_path.write_text(svg_content, encoding="utf-8")
     export_files["svg"] = svg_path
     
+    from cairosvg.parser import Tree as SvgTree
+    from cairosvg.surface import PDFSurface
+
+    # Parse the SVG once and render both the PDF and the raster from that tree
+    svg_tree = SvgTree(bytestring=svg_content.encode("utf-8"))
+    
     # Export PDF
     pdf_path = base_path.with_suffix(".pdf")
     try:
-        cairosvg.svg2pdf(bytestring=svg_content.encode("utf-8"), write_to=str(pdf_path))
+        PDFSurface(svg_tree, str(pdf_path), 96).finish()
         logger.info(f"[file-export] Exported PDF to {pdf_path}")
     except Exception as e:
         logger.error(f"[file-export] Failed to export PDF: {e}")
@@ -412,10 +617,7 @@ def export_dieline_formats(packaging_state: PackagingState, session_id: str) ->
     # Export JPG
     jpg_path = base_path.with_suffix(".jpg")
     try:
-        png_data = cairosvg.svg2png(bytestring=svg_content.encode("utf-8"))
-        img = Image.open(io.BytesIO(png_data))
-        rgb_img = img.convert("RGB")
-        rgb_img.save(jpg_path, "JPEG", quality=95)
+        _rgb_to_jpg(_rasterize_svg(svg_tree), jpg_path)
         logger.info(f"[file-export] Exported JPG to {jpg_path}")
     except Exception as e:
         logger.error(f"[file-export] Failed to export JPG: {e}")
@@ -450,3 +652,35 @@ def get_export_file_path(session_id: str, file_type: str, format: str) -> Option
     
     return None
 
+
+def stat_export_file(file_path: Optional[Path]) -> Optional[os.stat_result]:
+    """Stat an export file once so the result can be handed to FileResponse."""
+    if not file_path:
+        return None
+    try:
+        return file_path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def start_export_pool() -> None:
+    """Create the worker processes that run CPU-bound exports outside the GIL."""
+    global _export_pool
+    workers = min(settings.EXPORT_MAX_WORKERS, os.cpu_count() or 1)
+    if _export_pool is None and workers > 0:
+        _export_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.info("[file-export] Started export pool with %s workers", workers)
+
+
+def shutdown_export_pool() -> None:
+    global _export_pool
+    if _export_pool is not None:
+        _export_pool.shutdown(wait=False, cancel_futures=True)
+        _export_pool = None
+
+
+async def run_export(func: Callable[..., T], *args) -> T:
+    """Run an export function in the process pool (or a thread when there is none)."""
+    if _export_pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_export_pool, func, *args)
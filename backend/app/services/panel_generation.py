@@ -13,6 +13,20 @@ from app.services.panel_prompt_templates import panel_prompt_builder
 
 logger = logging.getLogger(__name__)
 
+_BOX_PANEL_CONTEXTS = {
+    "front": "front face (primary visible panel)",
+    "back": "back face (opposite side)",
+    "left": "left side panel",
+    "right": "right side panel",
+    "top": "top face (lid/opening area)",
+    "bottom": "bottom face (base)",
+}
+_CYLINDER_PANEL_CONTEXTS = {
+    "body": "cylindrical body wrap (curved surface)",
+    "top": "top circular cap",
+    "bottom": "bottom circular base",
+}
+
 
 class PanelGenerationService:
     """Service for generating panel textures using Gemini."""
@@ -157,22 +171,7 @@ class PanelGenerationService:
     
     def _get_panel_context(self, panel_id: str, package_type: str) -> str:
         """Get descriptive context for a panel."""
-        if package_type == "box":
-            contexts = {
-                "front": "front face (primary visible panel)",
-                "back": "back face (opposite side)",
-                "left": "left side panel",
-                "right": "right side panel",
-                "top": "top face (lid/opening area)",
-                "bottom": "bottom face (base)",
-            }
-        else:  # cylinder
-            contexts = {
-                "body": "cylindrical body wrap (curved surface)",
-                "top": "top circular cap",
-                "bottom": "bottom circular base",
-            }
-        
+        contexts = _BOX_PANEL_CONTEXTS if package_type == "box" else _CYLINDER_PANEL_CONTEXTS
         return contexts.get(panel_id, panel_id)
 
 
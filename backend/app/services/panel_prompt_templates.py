@@ -6,11 +6,50 @@ packaging panels with strict style, dimension, and quality controls.
 """
 
 import logging
-from typing import Optional, Dict
-from fractions import Fraction
+import math
+from bisect import bisect_left
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Optional, Dict, Mapping, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Common aspect ratios (width / height, label), ascending for bisect
+_COMMON_RATIOS = (
+    (1.0, "1:1"),
+    (1.33, "4:3"),
+    (1.5, "3:2"),
+    (1.6, "16:10"),
+    (1.78, "16:9"),
+    (2.0, "2:1"),
+    (2.35, "21:9"),
+)
+_COMMON_RATIO_VALUES = tuple(value for value, _ in _COMMON_RATIOS)
+_COMMON_RATIO_LABELS = tuple(label for _, label in _COMMON_RATIOS)
+
+# Single-word prompts too vague to design a panel from (compared lowercased)
+VAGUE_PROMPTS = frozenset({"logo", "design", "texture", "pattern", "cool", "nice", "good"})
+# Anything longer can't be one of them, so it isn't lowercased just to miss the lookup
+_VAGUE_PROMPT_MAX_LEN = max(map(len, VAGUE_PROMPTS))
+
+
+CompiledTemplate = Tuple[Tuple[str, Optional[str], str], ...]
+
+
+def _compile_template(template: str) -> CompiledTemplate:
+    """Split a str.format template into (literal, field, format_spec) segments once."""
+    return tuple((literal, field, spec or "") for literal, field, spec, _ in Formatter().parse(template))
+
+
+def _render_template(compiled: CompiledTemplate, values: Mapping[str, Any]) -> str:
+    """Fill a compiled template; same output as ``template.format(**values)``."""
+    parts = []
+    for literal, field, spec in compiled:
+        parts.append(literal)
+        if field is not None:
+            parts.append(format(values[field], spec))
+    return "".join(parts)
+
 
 class PanelPromptBuilder:
     """Builds structured prompts for panel generation with strict guardrails."""
@@ -166,12 +205,18 @@ USER REQUEST:
 OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ratio, with composition and scale appropriate for a {panel_size_description} {orientation} panel.
 """
 
+    # Templates pre-split into (literal, field, format_spec) segments; see _render_template
+    _MASTER_COMPILED = _compile_template(MASTER_TEMPLATE)
+    _SIMPLE_COMPILED = _compile_template(SIMPLE_TEMPLATE)
+    _MOCKUP_EXTRACTION_COMPILED = _compile_template(MOCKUP_EXTRACTION_TEMPLATE)
+
     @staticmethod
     def mm_to_inches(mm: float) -> float:
         """Convert millimeters to inches."""
         return mm / 25.4
     
     @staticmethod
+    @lru_cache(maxsize=256)  # Pure in (width, height); a box's faces share a few sizes
     def calculate_aspect_ratio(width: float, height: float) -> str:
         """
         Calculate aspect ratio as a simplified fraction string (e.g., "16:9").
@@ -187,38 +232,32 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         if width <= 0 or height <= 0:
             return "1:1"
         
-        # Use Fraction to find the simplified ratio
+        # Simplify with an integer gcd
         # Multiply by 1000 to handle decimals, then simplify
         w_int = int(round(width * 1000))
         h_int = int(round(height * 1000))
+        if not w_int or not h_int:
+            return "1:1"  # Too small to express at this precision
         
-        fraction = Fraction(w_int, h_int)
+        divisor = math.gcd(w_int, h_int)
+        numerator, denominator = w_int // divisor, h_int // divisor
         
         # If the fraction is already simple enough, use it
-        if fraction.denominator <= 100:
-            return f"{fraction.numerator}:{fraction.denominator}"
+        if denominator <= 100:
+            return f"{numerator}:{denominator}"
         
-        # Otherwise, round to a common aspect ratio
+        # Otherwise, round to the closest common aspect ratio (lower one on a tie)
         ratio_value = width / height
+        i = bisect_left(_COMMON_RATIO_VALUES, ratio_value)
+        neighbours = [j for j in (i - 1, i) if 0 <= j < len(_COMMON_RATIO_VALUES)]
+        closest = min(neighbours, key=lambda j: abs(_COMMON_RATIO_VALUES[j] - ratio_value))
+        if abs(_COMMON_RATIO_VALUES[closest] - ratio_value) < 0.1:
+            return _COMMON_RATIO_LABELS[closest]
         
-        # Common aspect ratios
-        common_ratios = {
-            1.0: "1:1",
-            1.33: "4:3",
-            1.5: "3:2",
-            1.6: "16:10",
-            1.78: "16:9",
-            2.0: "2:1",
-            2.35: "21:9",
-        }
-        
-        # Find closest common ratio
-        closest = min(common_ratios.keys(), key=lambda x: abs(x - ratio_value))
-        if abs(closest - ratio_value) < 0.1:
-            return common_ratios[closest]
+        # Fallback: use simplified fraction with max denominator (rare, so import here)
+        from fractions import Fraction
         
-        # Fallback: use simplified fraction with max denominator
-        fraction_limited = fraction.limit_denominator(20)
+        fraction_limited = Fraction(numerator, denominator).limit_denominator(20)
         return f"{fraction_limited.numerator}:{fraction_limited.denominator}"
     
     @staticmethod
@@ -250,6 +289,7 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
             return "square"
     
     @staticmethod
+    @lru_cache(maxsize=256)  # Pure in (panel size, face); regenerations reuse it
     def generate_scale_guidance(
         panel_width_mm: float, 
         panel_height_mm: float,
@@ -302,10 +342,8 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         Returns:
             (is_valid, error_message)
         """
-        prompt = prompt.strip()
-        
-        # Check minimum length
-        if len(prompt) < 3:
+        # Check minimum length (stripping can only shorten, so this needs no strip)
+        if len(prompt) < 3 or len(prompt := prompt.strip()) < 3:
             return False, "Prompt is too short. Please provide more detail about what you want."
         
         # Check maximum length
@@ -313,8 +351,7 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
             return False, "Prompt is too long. Please keep it under 2000 characters."
         
         # Warn about overly vague prompts
-        vague_prompts = ["logo", "design", "texture", "pattern", "cool", "nice", "good"]
-        if prompt.lower() in vague_prompts:
+        if len(prompt) <= _VAGUE_PROMPT_MAX_LEN and prompt.lower() in VAGUE_PROMPTS:
             return False, (
                 f"Prompt '{prompt}' is too vague. Please be more specific about:\n"
                 "- What style or theme you want\n"
@@ -325,6 +362,67 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         
         return True, None
     
+    @classmethod
+    def _prepare_panel_fields(
+        cls,
+        face_name: str,
+        panel_width_mm: float,
+        panel_height_mm: float,
+        user_prompt: str,
+    ) -> Dict[str, Any]:
+        """Validate the prompt and compute the per-panel template fields shared by the builders."""
+        is_valid, error = cls.validate_user_prompt(user_prompt)
+        if not is_valid:
+            raise ValueError(error)
+        
+        return dict(
+            face_name=face_name,
+            panel_width_in=cls.mm_to_inches(panel_width_mm),
+            panel_height_in=cls.mm_to_inches(panel_height_mm),
+            panel_width_mm=int(panel_width_mm),
+            panel_height_mm=int(panel_height_mm),
+            aspect_ratio_lock=cls.calculate_aspect_ratio(panel_width_mm, panel_height_mm),
+            scale_guidance=cls.generate_scale_guidance(panel_width_mm, panel_height_mm, face_name),
+            orientation=cls.get_panel_orientation(panel_width_mm, panel_height_mm),
+            panel_size_description=cls.get_panel_size_description(panel_width_mm, panel_height_mm),
+            user_prompt=user_prompt,
+        )
+    
+    @classmethod
+    @lru_cache(maxsize=128)  # Regenerating a face, or same-sized faces, re-renders identical inputs
+    def _render_master_prompt(
+        cls,
+        face_name: str,
+        panel_width_mm: float,
+        panel_height_mm: float,
+        box_width_mm: float,
+        box_height_mm: float,
+        box_depth_mm: float,
+        user_prompt: str,
+        has_reference_mockup: bool,
+    ) -> str:
+        fields = cls._prepare_panel_fields(face_name, panel_width_mm, panel_height_mm, user_prompt)
+        fields.update(
+            box_width_in=cls.mm_to_inches(box_width_mm),
+            box_height_in=cls.mm_to_inches(box_height_mm),
+            box_depth_in=cls.mm_to_inches(box_depth_mm),
+        )
+        # Choose template based on whether we have a reference mockup
+        template = cls._MASTER_COMPILED if has_reference_mockup else cls._SIMPLE_COMPILED
+        return _render_template(template, fields)
+    
+    @classmethod
+    @lru_cache(maxsize=128)
+    def _render_simple_prompt(
+        cls,
+        face_name: str,
+        panel_width_mm: float,
+        panel_height_mm: float,
+        user_prompt: str,
+    ) -> str:
+        fields = cls._prepare_panel_fields(face_name, panel_width_mm, panel_height_mm, user_prompt)
+        return _render_template(cls._SIMPLE_COMPILED, fields)
+    
     def build_master_prompt(
         self,
         face_name: str,
@@ -352,57 +450,31 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         Returns:
             Complete structured prompt
         """
-        # Validate user prompt first
-        is_valid, error = self.validate_user_prompt(user_prompt)
-        if not is_valid:
-            raise ValueError(error)
-        
-        # Convert to inches
-        panel_width_in = self.mm_to_inches(panel_width_mm)
-        panel_height_in = self.mm_to_inches(panel_height_mm)
-        box_width_in = self.mm_to_inches(box_width_mm)
-        box_height_in = self.mm_to_inches(box_height_mm)
-        box_depth_in = self.mm_to_inches(box_depth_mm)
-        
-        # Calculate aspect ratio
-        aspect_ratio = self.calculate_aspect_ratio(panel_width_mm, panel_height_mm)
-        
-        # Generate scale and composition guidance
-        scale_guidance = self.generate_scale_guidance(panel_width_mm, panel_height_mm, face_name)
-        orientation = self.get_panel_orientation(panel_width_mm, panel_height_mm)
-        panel_size_description = self.get_panel_size_description(panel_width_mm, panel_height_mm)
-        
-        # Log the generation details
-        logger.info(f"[prompt-builder] Building prompt for {face_name} panel")
-        logger.info(f"[prompt-builder] Dimensions: {panel_width_mm}mm × {panel_height_mm}mm ({panel_width_in:.2f}\" × {panel_height_in:.2f}\")")
-        logger.info(f"[prompt-builder] Aspect ratio: {aspect_ratio}")
-        logger.info(f"[prompt-builder] Size: {panel_size_description}, Orientation: {orientation}")
-        logger.info(f"[prompt-builder] Has reference mockup: {has_reference_mockup}")
-        
-        # Choose template based on whether we have a reference mockup
-        if has_reference_mockup:
-            template = self.MASTER_TEMPLATE
-        else:
-            template = self.SIMPLE_TEMPLATE
-        
-        # Fill in the template
-        prompt = template.format(
-            face_name=face_name,
-            panel_width_in=panel_width_in,
-            panel_height_in=panel_height_in,
-            panel_width_mm=int(panel_width_mm),
-            panel_height_mm=int(panel_height_mm),
-            aspect_ratio_lock=aspect_ratio,
-            box_width_in=box_width_in,
-            box_height_in=box_height_in,
-            box_depth_in=box_depth_in,
-            scale_guidance=scale_guidance,
-            orientation=orientation,
-            panel_size_description=panel_size_description,
-            user_prompt=user_prompt,
+        prompt = self._render_master_prompt(
+            face_name, panel_width_mm, panel_height_mm,
+            box_width_mm, box_height_mm, box_depth_mm,
+            user_prompt, has_reference_mockup,
         )
         
-        logger.info(f"[prompt-builder] Generated prompt length: {len(prompt)} characters")
+        # Log the generation details (outside the cache, so repeat builds still log)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[prompt-builder] Building prompt for %s panel", face_name)
+            logger.info(
+                "[prompt-builder] Dimensions: %smm × %smm (%.2f\" × %.2f\")",
+                panel_width_mm, panel_height_mm,
+                self.mm_to_inches(panel_width_mm), self.mm_to_inches(panel_height_mm),
+            )
+            logger.info(
+                "[prompt-builder] Aspect ratio: %s",
+                self.calculate_aspect_ratio(panel_width_mm, panel_height_mm),
+            )
+            logger.info(
+                "[prompt-builder] Size: %s, Orientation: %s",
+                self.get_panel_size_description(panel_width_mm, panel_height_mm),
+                self.get_panel_orientation(panel_width_mm, panel_height_mm),
+            )
+            logger.info("[prompt-builder] Has reference mockup: %s", has_reference_mockup)
+            logger.info("[prompt-builder] Generated prompt length: %d characters", len(prompt))
         
         return prompt
     
@@ -414,31 +486,7 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         user_prompt: str,
     ) -> str:
         """Build a simple prompt for basic texture generation without full context."""
-        is_valid, error = self.validate_user_prompt(user_prompt)
-        if not is_valid:
-            raise ValueError(error)
-        
-        panel_width_in = self.mm_to_inches(panel_width_mm)
-        panel_height_in = self.mm_to_inches(panel_height_mm)
-        aspect_ratio = self.calculate_aspect_ratio(panel_width_mm, panel_height_mm)
-        scale_guidance = self.generate_scale_guidance(panel_width_mm, panel_height_mm, face_name)
-        orientation = self.get_panel_orientation(panel_width_mm, panel_height_mm)
-        panel_size_description = self.get_panel_size_description(panel_width_mm, panel_height_mm)
-        
-        prompt = self.SIMPLE_TEMPLATE.format(
-            face_name=face_name,
-            panel_width_in=panel_width_in,
-            panel_height_in=panel_height_in,
-            panel_width_mm=int(panel_width_mm),
-            panel_height_mm=int(panel_height_mm),
-            aspect_ratio_lock=aspect_ratio,
-            scale_guidance=scale_guidance,
-            orientation=orientation,
-            panel_size_description=panel_size_description,
-            user_prompt=user_prompt,
-        )
-        
-        return prompt
+        return self._render_simple_prompt(face_name, panel_width_mm, panel_height_mm, user_prompt)
     
     def build_mockup_extraction_prompt(
         self,
@@ -455,13 +503,13 @@ OUTPUT: Generate exactly ONE flat panel texture at {aspect_ratio_lock} aspect ra
         
         aspect_ratio = self.calculate_aspect_ratio(panel_width_mm, panel_height_mm)
         
-        return self.MOCKUP_EXTRACTION_TEMPLATE.format(
+        return _render_template(self._MOCKUP_EXTRACTION_COMPILED, dict(
             face_name=face_name,
             panel_width_mm=int(panel_width_mm),
             panel_height_mm=int(panel_height_mm),
             aspect_ratio_lock=aspect_ratio,
             user_prompt=user_prompt,
-        )
+        ))
 
 
 # Global instance
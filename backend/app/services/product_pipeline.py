@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import base64
 import logging
 import time
@@ -9,10 +8,10 @@ from typing import Any, Dict, List, Optional
 
 # Make trellis optional - only needed for product generation
 try:
-    from app.integrations.trellis import trellis_service
+    from app.integrations.trellis import get_trellis_service
     TRELLIS_AVAILABLE = True
 except ImportError:
-    trellis_service = None
+    get_trellis_service = None
     TRELLIS_AVAILABLE = False
 from app.integrations.gemini import gemini_image_service
 from app.models.product_state import (
@@ -25,9 +24,10 @@ from app.models.product_state import (
     save_product_state,
     save_product_status,
 )
-from app.core.config import settings
+from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 # Create artifacts directory for debug outputs
 ARTIFACTS_DIR = Path(__file__).parent.parent.parent / "tests" / "artifacts"
@@ -253,8 +253,8 @@ class ProductPipelineService:
         multi_image: Optional[bool] = None,
         multi_image_algo: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Call Trellis via the existing integration in a background thread."""
-        if not TRELLIS_AVAILABLE or not trellis_service:
+        """Call Trellis via the existing integration (awaits the fal.ai queue job)."""
+        if not TRELLIS_AVAILABLE or not get_trellis_service:
             raise RuntimeError("Trellis service is not available. Please install fal_client dependency.")
         
         def progress_callback(status: str, progress: int, message: str):
@@ -274,8 +274,7 @@ class ProductPipelineService:
         )
         algo = multi_image_algo or settings.TRELLIS_MULTIIMAGE_ALGO
 
-        return await asyncio.to_thread(
-            trellis_service.generate_3d_asset,
+        return await get_trellis_service().generate_3d_asset(
             images=images,
             progress_callback=progress_callback,
             use_multi_image=use_multi,
@@ -1,6 +1,13 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import get_settings
+from app.core.redis import redis_service
 from app.endpoints.packaging.router import router as packaging_router
+from app.models.packaging_state import get_packaging_state
+from app.models.product_state import get_product_state, migrate_legacy_product_state
+from app.services.file_export import shutdown_export_pool, start_export_pool
 import logging
 
 # Configure logging
@@ -9,24 +16,52 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-app = FastAPI(title="Trellis 3D Generation API")
+
+def _prewarm() -> None:
+    """Open the Redis connection, migrate legacy state and prime the state caches before the first request."""
+    redis_service.ping()
+    migrate_legacy_product_state()
+    get_product_state()
+    get_packaging_state()
+    logging.info("Prewarmed Redis connection and state caches")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _prewarm()
+    start_export_pool()
+    yield
+    shutdown_export_pool()
+
+
+app = FastAPI(title="Trellis 3D Generation API", lifespan=lifespan)
 
 # Add CORS middleware
+# Origins come from CORS_ALLOW_ORIGINS ("*" for development; list them in production).
+# A frozenset turns the middleware's per-request origin check into a hash lookup.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # For development; restrict in production
+    allow_origins=frozenset(
+        origin.strip() for origin in get_settings().CORS_ALLOW_ORIGINS.split(",") if origin.strip()
+    ),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "DELETE", "OPTIONS"),  # Everything the routers expose
+    # The frontend's fetch calls (lib/*-api.ts, hooks/usePanelTexture.ts) set no other header;
+    # If-None-Match on /product/status comes from the browser cache and needs no preflight
+    allow_headers=("Content-Type",),
 )
 
 # Include routers - make optional since they may have missing dependencies
-try:
-    from app.endpoints.trellis.router import router as trellis_router
-    app.include_router(trellis_router)
-    logging.info("Trellis router loaded")
-except ImportError as e:
-    logging.warning(f"Trellis router not available (missing dependencies): {e}")
+# Demo mock mode serves fixtures and never calls fal.ai, so leave the raw Trellis route out
+if get_settings().DEMO_MOCK_MODE:
+    logging.info("Trellis router skipped (demo mock mode)")
+else:
+    try:
+        from app.endpoints.trellis.router import router as trellis_router
+        app.include_router(trellis_router)
+        logging.info("Trellis router loaded")
+    except ImportError as e:
+        logging.warning(f"Trellis router not available (missing dependencies): {e}")
 
 try:
     from app.endpoints.product.router import router as product_router
@@ -56,5 +91,13 @@ def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # The reloader's file-watching supervisor is for development only (WATCH_FILES=true).
+    # uvicorn[standard] supplies uvloop and httptools, which uvicorn's "auto" loop/http pick up.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=os.getenv("WATCH_FILES", "").lower() == "true",
+    )
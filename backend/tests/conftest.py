@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import fakeredis
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.core.redis import _CLAIM_HASH_LUA, RedisService, redis_service
+from app.models import packaging_state, product_state
+
+
+def _attach_fake_server(service: RedisService, client: fakeredis.FakeRedis) -> None:
+    service.client = client
+    service._claim_script = client.register_script(_CLAIM_HASH_LUA)
+    service._use_fallback = False
+
+
+@pytest.fixture(params=["server", "fallback"])
+def redis_backend(request):
+    """A standalone RedisService talking to a fake Redis server, or using its in-memory fallback."""
+    service = RedisService()
+    if request.param == "server":
+        _attach_fake_server(service, fakeredis.FakeRedis(decode_responses=True))
+    else:
+        service._use_fallback = True
+    return service
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the shared redis_service at an empty fake Redis server and drop cached state."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_service, "client", client)
+    monkeypatch.setattr(redis_service, "_claim_script", client.register_script(_CLAIM_HASH_LUA))
+    monkeypatch.setattr(redis_service, "_use_fallback", False)
+    for cache in (product_state._product_state_cache, packaging_state._packaging_state_cache):
+        monkeypatch.setattr(cache, "_entry", None)
+        monkeypatch.setattr(cache, "_json", None)
+    monkeypatch.setattr(product_state, "_status_cache", None)
+    return client
+
+
+@pytest.fixture(params=["server", "fallback"])
+def shared_redis(request, fake_redis, monkeypatch):
+    """Like fake_redis, but also run the test against redis_service's in-memory fallback."""
+    if request.param == "fallback":
+        monkeypatch.setattr(redis_service, "_use_fallback", True)
+        monkeypatch.setattr(redis_service, "_fallback_store", {})
+        monkeypatch.setattr(redis_service, "_fallback_hashes", {})
+    return request.param
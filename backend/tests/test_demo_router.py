@@ -0,0 +1,53 @@
+import importlib
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app.models.packaging_state import get_packaging_state
+from app.models.product_state import get_product_state
+
+# The package re-exports its APIRouter as ``router``, shadowing the module name
+demo_router = importlib.import_module("app.endpoints.demo.router")
+
+
+@pytest.fixture
+def fixtures_file(tmp_path, monkeypatch):
+    path = tmp_path / "demo_fixtures.json"
+    monkeypatch.setattr(demo_router, "FIXTURES_PATH", path)
+    monkeypatch.setattr(demo_router, "_FIXTURES_STR", str(path))
+    monkeypatch.setattr(demo_router, "_fixtures_cache", None)
+    return path
+
+
+def test_incomplete_section_is_skipped_not_fatal(fake_redis, fixtures_file):
+    fixtures_file.write_text(json.dumps({
+        "_comment": "product section is missing its model_url",
+        "product_create": {"prompt": "Half-filled product"},
+        "packaging": {
+            "package_type": "box",
+            "panel_textures": {
+                "front": {"texture_url": "https://cdn.local/front.png", "prompt": "front"},
+                "back": {"texture_url": "PASTE_BACK_TEXTURE_URL_HERE"},
+            },
+        },
+    }))
+
+    response = TestClient(app).post("/demo/seed-from-fixtures")
+
+    assert response.status_code == 200
+    assert response.json()["results"] == {
+        "product": "Skipped (no valid model_url)",
+        "packaging": "Seeded 1 panels",
+    }
+    assert get_product_state().prompt is None
+    assert list(get_packaging_state().panel_textures) == ["front"]
+
+
+def test_malformed_json_is_rejected(fake_redis, fixtures_file):
+    fixtures_file.write_text("{not json")
+
+    response = TestClient(app).post("/demo/seed-from-fixtures")
+
+    assert response.status_code == 400
@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+import trimesh
+from PIL import Image
+
+from app.models.packaging_state import PackagingState
+from app.services import file_export
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_export, "EXPORT_DIR", tmp_path)
+    return tmp_path
+
+
+def _require_cairosvg():
+    try:
+        import cairosvg  # noqa: F401
+    except (ImportError, OSError) as exc:  # OSError: the cairo shared library is missing
+        pytest.skip(f"cairosvg unavailable: {exc}")
+
+
+def test_dieline_jpg_export_decodes(export_dir):
+    _require_cairosvg()
+
+    files = file_export.export_dieline_formats(PackagingState(), "test")
+
+    assert set(files) == {"svg", "pdf", "jpg"}
+    with Image.open(files["jpg"]) as image:
+        assert image.format == "JPEG"
+        assert image.mode == "RGB"
+        assert image.size == (800, 600)
+        # The panel outlines are drawn in colour over a transparent (black) background
+        assert np.asarray(image).max() > 100
+
+
+def test_rasterize_svg_keeps_unpremultiplied_colour():
+    _require_cairosvg()
+    from cairosvg.parser import Tree
+
+    svg = (
+        b'<svg width="4" height="4" xmlns="http://www.w3.org/2000/svg">'
+        b'<rect width="4" height="4" fill="#ffffff" fill-opacity="0.5"/></svg>'
+    )
+
+    rgb = file_export._rasterize_svg(Tree(bytestring=svg))
+
+    assert rgb.shape == (4, 4, 3)
+    # Premultiplied ARGB would read back as mid-grey here
+    assert rgb.min() >= 250
+
+
+def _load_mesh(path, file_type):
+    with open(path, "rb") as f:
+        return trimesh.load(f, file_type=file_type, process=False)
+
+
+def test_binary_stl_matches_trimesh_export(tmp_path):
+    mesh = trimesh.creation.icosphere(subdivisions=1)
+    ours, theirs = tmp_path / "ours.stl", tmp_path / "theirs.stl"
+
+    file_export._write_binary_stl(mesh, ours)
+    theirs.write_bytes(trimesh.exchange.stl.export_stl(mesh))
+
+    data, expected = ours.read_bytes(), theirs.read_bytes()
+    # Same record layout; only the free-form 80-byte header differs
+    assert len(data) == len(expected) == 84 + 50 * len(mesh.faces)
+    assert data[80:84] == expected[80:84]
+    records = np.frombuffer(data[84:], dtype=file_export._STL_RECORD)
+    expected_records = np.frombuffer(expected[84:], dtype=file_export._STL_RECORD)
+    np.testing.assert_array_equal(records["vertices"], expected_records["vertices"])
+    np.testing.assert_allclose(records["normal"], expected_records["normal"], atol=1e-6)
+    np.testing.assert_allclose(_load_mesh(ours, "stl").area, mesh.area, rtol=1e-6)
+
+
+def test_binary_stl_gives_degenerate_faces_a_zero_normal(tmp_path):
+    mesh = trimesh.Trimesh(vertices=[[0, 0, 0], [1, 0, 0], [2, 0, 0]], faces=[[0, 1, 2]], process=False)
+    path = tmp_path / "flat.stl"
+
+    file_export._write_binary_stl(mesh, path)
+
+    records = np.frombuffer(path.read_bytes()[84:], dtype=file_export._STL_RECORD)
+    np.testing.assert_array_equal(records["normal"], np.zeros((1, 3), dtype=np.float32))
+
+
+def test_obj_geometry_matches_trimesh_export(tmp_path):
+    mesh = trimesh.creation.box(extents=(1.0, 2.5, 0.125))
+    ours, theirs = tmp_path / "ours.obj", tmp_path / "theirs.obj"
+
+    file_export._write_obj_geometry(mesh, ours)
+    theirs.write_text(trimesh.exchange.obj.export_obj(mesh, include_normals=False, include_texture=False))
+
+    loaded, expected = _load_mesh(ours, "obj"), _load_mesh(theirs, "obj")
+    np.testing.assert_allclose(loaded.vertices, expected.vertices, atol=1e-6)
+    np.testing.assert_array_equal(loaded.faces, expected.faces)
+    np.testing.assert_array_equal(loaded.faces, mesh.faces)
+
+
+def test_obj_export_keeps_vertex_colours(tmp_path):
+    mesh = trimesh.creation.box()
+    colours = np.zeros((len(mesh.vertices), 4), dtype=np.uint8)
+    colours[:, 0] = np.arange(len(mesh.vertices)) * 30
+    colours[:, 3] = 255
+    mesh.visual.vertex_colors = colours
+    path = tmp_path / "coloured.obj"
+
+    file_export._export_obj(mesh, path)
+
+    loaded = _load_mesh(path, "obj")
+    assert loaded.visual.kind == "vertex"
+    np.testing.assert_array_equal(loaded.visual.vertex_colors, colours)
+
+
+def _require_offscreen_gl():
+    pyrender = file_export._import_pyrender()
+    if pyrender is None:
+        pytest.skip("pyrender unavailable")
+    try:
+        pyrender.OffscreenRenderer(8, 8).delete()
+    except Exception as exc:  # No EGL/OSMesa context on this machine
+        pytest.skip(f"offscreen GL unavailable: {exc}")
+
+
+def test_render_jpg_renders_the_mesh_offscreen(tmp_path, monkeypatch):
+    _require_offscreen_gl()
+
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("fell back instead of rendering")
+
+    monkeypatch.setattr(file_export, "_create_scene_thumbnail", no_fallback)
+    monkeypatch.setattr(file_export, "_create_placeholder_image", no_fallback)
+    path = tmp_path / "render.jpg"
+
+    file_export._render_jpg(trimesh.Scene(trimesh.creation.box(extents=(1.0, 2.0, 0.5))), path, resolution=(128, 128))
+
+    with Image.open(path) as image:
+        assert image.size == (128, 128)
+        pixels = np.asarray(image.convert("L"))
+    # Shaded faces against the background, not a blank frame
+    assert pixels.max() - pixels.min() > 50
+
+
+def test_mesh_formats_give_the_obj_writer_its_own_mesh(tmp_path, monkeypatch):
+    mesh = trimesh.creation.box()
+    written = {}
+
+    def record(fmt):
+        def write(target, output_path):
+            written[fmt] = target
+            output_path.write_bytes(b"")
+        return write
+
+    monkeypatch.setattr(file_export, "_export_stl", record("stl"))
+    monkeypatch.setattr(file_export, "_export_obj", record("obj"))
+    monkeypatch.setattr(file_export, "_render_jpg", lambda scene, path, bounds=None: path.write_bytes(b""))
+
+    files = file_export._export_mesh_formats(mesh, trimesh.Scene([mesh]), tmp_path / "package")
+
+    assert set(files) == {"stl", "blend", "jpg"}
+    assert written["obj"] is not mesh
+    np.testing.assert_array_equal(written["obj"].vertices, mesh.vertices)
+    np.testing.assert_array_equal(written["obj"].faces, mesh.faces)
@@ -0,0 +1,36 @@
+import base64
+from types import SimpleNamespace
+
+import pytest
+
+from app.integrations.gemini import GeminiImageService
+
+
+def _data_url(raw: bytes) -> str:
+    return f"data:image/png;base64,{base64.b64encode(raw).decode()}"
+
+
+@pytest.mark.asyncio
+async def test_edit_sends_only_the_primary_reference_with_each_view():
+    calls = []
+
+    async def generate_content(model, contents, config):
+        calls.append(contents)
+        part = SimpleNamespace(inline_data=SimpleNamespace(data=b"out"))
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    service = GeminiImageService()
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+    images = await service.generate_product_images(
+        "make it red",
+        "edit",
+        image_count=2,
+        reference_images=[_data_url(b"front"), _data_url(b"side")],
+    )
+
+    assert len(images) == 2
+    assert len(calls) == 2
+    for contents in calls:
+        assert isinstance(contents[0], str)
+        assert [part.inline_data.data for part in contents[1:]] == [b"front"]
@@ -0,0 +1,42 @@
+import importlib
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.models.packaging_state import PanelTexture, get_packaging_state, save_packaging_state
+
+packaging_router = importlib.import_module("app.endpoints.packaging.router")
+
+
+def _export_while_panel_is_generated(monkeypatch):
+    """Fake run_export that lets a panel texture land while the export runs."""
+    async def fake_run_export(export, state, session_id):
+        current = get_packaging_state()
+        current.set_panel_texture("front", PanelTexture(panel_id="front", texture_url="data:front", prompt="front"))
+        save_packaging_state(current)
+        return {"jpg": Path(f"{session_id}.jpg")}
+
+    monkeypatch.setattr(packaging_router, "run_export", fake_run_export)
+
+
+def test_package_export_keeps_writes_made_during_the_export(fake_redis, monkeypatch):
+    _export_while_panel_is_generated(monkeypatch)
+
+    response = TestClient(app).post("/packaging/export")
+
+    assert response.status_code == 200
+    state = get_packaging_state()
+    assert list(state.panel_textures) == ["front"]
+    assert list(state.export_files) == ["jpg"]
+
+
+def test_dieline_export_keeps_writes_made_during_the_export(fake_redis, monkeypatch):
+    _export_while_panel_is_generated(monkeypatch)
+
+    response = TestClient(app).post("/packaging/dieline/export")
+
+    assert response.status_code == 200
+    state = get_packaging_state()
+    assert list(state.panel_textures) == ["front"]
+    assert list(state.dieline_export_files) == ["jpg"]
@@ -0,0 +1,42 @@
+from string import Formatter
+
+import pytest
+
+from app.services.panel_prompt_templates import PanelPromptBuilder, _compile_template, _render_template
+
+
+def _sample_values(template):
+    """One value per field: floats where the template has a format spec, strings elsewhere."""
+    values = {}
+    for index, (_, field, spec, _) in enumerate(Formatter().parse(template)):
+        if field is not None:
+            values[field] = 1234.56789 / (index + 1) if spec else f"<{field}>"
+    return values
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        PanelPromptBuilder.MASTER_TEMPLATE,
+        PanelPromptBuilder.SIMPLE_TEMPLATE,
+        PanelPromptBuilder.MOCKUP_EXTRACTION_TEMPLATE,
+    ],
+    ids=["master", "simple", "mockup_extraction"],
+)
+def test_render_matches_str_format(template):
+    values = _sample_values(template)
+    assert values
+
+    assert _render_template(_compile_template(template), values) == template.format(**values)
+
+
+def test_render_keeps_escaped_braces_and_specs():
+    template = "{{literal}} {name}: {width:.2f} x {height:>6.1f}}}"
+    values = {"name": "front", "width": 3.14159, "height": 2.0}
+
+    assert _render_template(_compile_template(template), values) == template.format(**values)
+
+
+def test_render_requires_every_field():
+    with pytest.raises(KeyError):
+        _render_template(_compile_template("{face_name} {missing}"), {"face_name": "front"})
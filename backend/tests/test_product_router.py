@@ -0,0 +1,161 @@
+import asyncio
+import importlib
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from main import app
+from app.models.product_state import (
+    ProductStatus,
+    TrellisArtifacts,
+    claim_product_generation,
+    get_product_state,
+    get_product_status,
+    save_product_status,
+)
+
+# The package re-exports its APIRouter as ``router``, shadowing the module name
+product_router = importlib.import_module("app.endpoints.product.router")
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _start(state, prompt):
+    state.prompt = prompt
+    state.status = "pending"
+    state.in_progress = True
+    return state
+
+
+def test_second_concurrent_claim_loses(shared_redis):
+    # Both requests passed the in_progress pre-check against the same idle state
+    first = _start(get_product_state(), "first speaker")
+    second = _start(get_product_state(), "second speaker")
+
+    assert claim_product_generation(first, ProductStatus(status="pending", message="first"))
+    with pytest.raises(HTTPException) as excinfo:
+        product_router._claim_generation(second, ProductStatus(status="pending", message="second"))
+
+    assert excinfo.value.status_code == 409
+    assert get_product_state().prompt == "first speaker"
+    assert get_product_status().message == "first"
+
+
+def test_start_create_claims_generation(shared_redis, client, monkeypatch):
+    runs = []
+
+    async def fake_run_create(prompt, image_count):
+        runs.append((prompt, image_count))
+
+    monkeypatch.setattr(product_router.product_pipeline_service, "run_create", fake_run_create)
+
+    response = client.post("/product/create", json={"prompt": "matte black speaker", "image_count": 2})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+    state = get_product_state()
+    assert state.in_progress and state.prompt == "matte black speaker"
+    assert get_product_status().status == "pending"
+    assert runs == [("matte black speaker", 2)]
+
+
+def test_start_create_returns_409_when_claim_is_lost(shared_redis, client, monkeypatch):
+    # Another request claims the run after this one's pre-check already passed
+    monkeypatch.setattr(product_router, "_ensure_not_busy", lambda state: None)
+    assert claim_product_generation(_start(get_product_state(), "winner"), ProductStatus(status="pending"))
+
+    response = client.post("/product/create", json={"prompt": "late speaker", "image_count": 1})
+
+    assert response.status_code == 409
+    assert get_product_state().prompt == "winner"
+
+
+def test_status_etag_returns_304_until_status_changes(fake_redis, client):
+    save_product_status(ProductStatus(status="generating", message="first"))
+
+    first = client.get("/product/status")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.json()["message"] == "first"
+
+    unchanged = client.get("/product/status", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.content == b""
+
+    save_product_status(ProductStatus(status="generating", message="second"))
+
+    changed = client.get("/product/status", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["message"] == "second"
+
+
+def test_export_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(product_router, "_export_cache", OrderedDict())
+    monkeypatch.setattr(product_router, "_EXPORT_CACHE_SIZE", 3)
+
+    product_router._remember_exports("a.glb", {"stl": Path("a.stl"), "jpg": Path("a.jpg")})
+    product_router._remember_exports("b.glb", {"stl": Path("b.stl")})
+    # Re-exporting a.glb's STL makes it the most recent entry
+    product_router._remember_exports("a.glb", {"stl": Path("a2.stl")})
+    product_router._remember_exports("c.glb", {"stl": Path("c.stl")})
+
+    assert list(product_router._export_cache) == [("b.glb", "stl"), ("a.glb", "stl"), ("c.glb", "stl")]
+    assert product_router._export_cache[("a.glb", "stl")] == Path("a2.stl")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_exports_share_one_run(fake_redis, monkeypatch):
+    monkeypatch.setattr(product_router, "_export_cache", OrderedDict())
+    release = asyncio.Event()
+    runs = []
+
+    async def fake_run_export(export, state, session_id):
+        runs.append(session_id)
+        await release.wait()
+        return {"stl": Path(f"product_{session_id}.stl")}
+
+    monkeypatch.setattr(product_router, "run_export", fake_run_export)
+    state = get_product_state()
+    state.trellis_output = TrellisArtifacts(model_file="https://cdn.local/model.glb")
+
+    dropped = asyncio.create_task(product_router._export_product(state, "42"))
+    waiting = asyncio.create_task(product_router._export_product(state, "42"))
+    await asyncio.sleep(0)
+    # A caller going away must not cancel the export the other one is waiting on
+    dropped.cancel()
+    release.set()
+
+    assert await waiting == {"stl": Path("product_42.stl")}
+    assert runs == ["42"]
+    assert dropped.cancelled()
+    assert "42" not in product_router._export_inflight
+    assert get_product_state().export_files == {"stl": "product_42.stl"}
+    assert product_router._export_cache[("https://cdn.local/model.glb", "stl")] == Path("product_42.stl")
+
+
+@pytest.mark.asyncio
+async def test_export_keeps_state_written_during_the_export(fake_redis, monkeypatch):
+    monkeypatch.setattr(product_router, "_export_cache", OrderedDict())
+
+    async def fake_run_export(export, state, session_id):
+        # A generation is claimed while the export runs off the event loop
+        assert claim_product_generation(_start(get_product_state(), "new speaker"), ProductStatus(status="pending"))
+        return {"stl": Path("product.stl")}
+
+    monkeypatch.setattr(product_router, "run_export", fake_run_export)
+    state = get_product_state()
+    state.trellis_output = TrellisArtifacts(model_file="https://cdn.local/model.glb")
+
+    await product_router._export_product(state, "7")
+
+    saved = get_product_state()
+    assert saved.in_progress and saved.prompt == "new speaker"
+    assert saved.export_files == {"stl": "product.stl"}
@@ -0,0 +1,72 @@
+import fakeredis
+
+from app.core.redis import RedisService
+
+
+def test_set_many_writes_values_hashes_and_counters(redis_backend):
+    versions = redis_backend.set_many(
+        {"plain": "1"},
+        ["plain:version"],
+        hashes={"doc": {"a": '"x"', "b": "2"}},
+    )
+
+    assert versions == [1]
+    assert redis_backend.get("plain") == "1"
+    assert redis_backend.hgetall("doc") == {"a": '"x"', "b": "2"}
+
+    # HSET merges fields into the existing hash
+    assert redis_backend.set_many({}, ["plain:version"], hashes={"doc": {"b": "3"}}) == [2]
+    assert redis_backend.hgetall("doc") == {"a": '"x"', "b": "3"}
+
+
+def test_get_and_hgetall_reads_key_and_hash_together(redis_backend):
+    assert redis_backend.get_and_hgetall("doc:version", "doc") == (None, {})
+
+    redis_backend.set_many({}, ["doc:version"], hashes={"doc": {"a": "1"}})
+
+    assert redis_backend.get_and_hgetall("doc:version", "doc") == ("1", {"a": "1"})
+
+
+def test_hash_writes_fall_back_to_memory_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    service = RedisService()
+    service.client = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+    assert service.set_many({}, ["doc:version"], hashes={"doc": {"a": "1"}}) == [1]
+
+    assert service._use_fallback
+    assert service.hgetall("doc") == {"a": "1"}
+    assert service.get_and_hgetall("doc:version", "doc") == ("1", {"a": "1"})
+    assert service.delete("doc") == 1
+    assert service.hgetall("doc") == {}
+
+
+def test_claim_hash_writes_when_flag_is_unset(redis_backend):
+    version = redis_backend.claim_hash(
+        "doc", "busy", {"busy": "true", "who": '"a"'}, "doc:version", {"status": "pending"}
+    )
+
+    assert version == 1
+    assert redis_backend.hgetall("doc") == {"busy": "true", "who": '"a"'}
+    assert redis_backend.get("status") == "pending"
+
+
+def test_claim_hash_writes_nothing_when_flag_is_set(redis_backend):
+    redis_backend.set_many({"status": "running"}, ["doc:version"], hashes={"doc": {"busy": "true", "who": '"a"'}})
+
+    version = redis_backend.claim_hash(
+        "doc", "busy", {"busy": "true", "who": '"b"'}, "doc:version", {"status": "pending"}
+    )
+
+    assert version is None
+    assert redis_backend.hgetall("doc") == {"busy": "true", "who": '"a"'}
+    assert redis_backend.get("status") == "running"
+    assert redis_backend.get_version("doc:version") == 1
+
+
+def test_claim_hash_succeeds_again_once_flag_is_cleared(redis_backend):
+    redis_backend.claim_hash("doc", "busy", {"busy": "true"}, "doc:version")
+    redis_backend.set_many({}, ["doc:version"], hashes={"doc": {"busy": "false"}})
+
+    assert redis_backend.claim_hash("doc", "busy", {"busy": "true"}, "doc:version") == 3
@@ -0,0 +1,109 @@
+import pytest
+
+from app.models.product_state import (
+    LEGACY_PRODUCT_STATE_KEY,
+    PRODUCT_STATE_KEY,
+    ProductState,
+    ProductStatus,
+    get_product_state,
+    migrate_legacy_product_state,
+    save_product_state,
+    update_product_state_fields,
+)
+from app.models.state_cache import VersionedStateCache
+
+
+def test_product_state_round_trips_through_hash(fake_redis):
+    save_product_state(ProductState(prompt="speaker", images=["a", "b"]))
+
+    assert fake_redis.type(PRODUCT_STATE_KEY) == "hash"
+    assert fake_redis.hget(PRODUCT_STATE_KEY, "prompt") == '"speaker"'
+    assert get_product_state().images == ["a", "b"]
+
+
+def test_update_fields_only_rewrites_named_fields(fake_redis):
+    save_product_state(ProductState(prompt="speaker", message="first"))
+    state = get_product_state()
+    state.message = "second"
+    state.prompt = "not saved"
+
+    update_product_state_fields(state, "message")
+
+    assert fake_redis.hget(PRODUCT_STATE_KEY, "message") == '"second"'
+    assert fake_redis.hget(PRODUCT_STATE_KEY, "prompt") == '"speaker"'
+
+
+def test_legacy_string_state_is_migrated_once(fake_redis):
+    legacy = ProductState(prompt="old speaker", status="complete")
+    fake_redis.set(LEGACY_PRODUCT_STATE_KEY, legacy.model_dump_json())
+    fake_redis.set(f"{LEGACY_PRODUCT_STATE_KEY}:version", "7")
+
+    assert migrate_legacy_product_state()
+
+    assert get_product_state().prompt == "old speaker"
+    assert not fake_redis.exists(LEGACY_PRODUCT_STATE_KEY, f"{LEGACY_PRODUCT_STATE_KEY}:version")
+    assert not migrate_legacy_product_state()
+
+
+def test_legacy_state_never_overwrites_hash_state(fake_redis):
+    save_product_state(ProductState(prompt="current"))
+    fake_redis.set(LEGACY_PRODUCT_STATE_KEY, ProductState(prompt="old").model_dump_json())
+
+    assert migrate_legacy_product_state()
+
+    assert get_product_state().prompt == "current"
+    assert not fake_redis.exists(LEGACY_PRODUCT_STATE_KEY)
+
+
+@pytest.fixture
+def status_cache(fake_redis):
+    return VersionedStateCache("test:status", ProductStatus)
+
+
+def test_load_is_empty_until_stored(status_cache):
+    assert status_cache.load() is None
+    assert status_cache.load_json() is None
+
+
+def test_store_then_load_returns_an_independent_copy(status_cache):
+    stored = ProductStatus(status="pending", message="queued")
+    status_cache.store(stored)
+
+    loaded = status_cache.load()
+    loaded.message = "mutated by a handler"
+
+    assert status_cache.load() == stored
+    assert status_cache.load_json() == stored.model_dump_json()
+
+
+def test_unchanged_version_serves_the_cached_model(fake_redis, status_cache):
+    status_cache.store(ProductStatus(message="cached"))
+    # Payload changes without a version bump are not picked up
+    fake_redis.set("test:status", ProductStatus(message="sneaky").model_dump_json())
+
+    assert status_cache.load().message == "cached"
+
+
+def test_version_bump_from_another_writer_invalidates(status_cache):
+    status_cache.store(ProductStatus(message="first"))
+    assert status_cache.load_json() is not None
+
+    # Another process writes through its own cache
+    VersionedStateCache("test:status", ProductStatus).store(ProductStatus(message="second"))
+
+    assert status_cache.load().message == "second"
+    assert '"second"' in status_cache.load_json()
+
+
+def test_field_update_from_stale_model_keeps_newer_fields(fake_redis):
+    save_product_state(ProductState(prompt="first"))
+    stale = get_product_state()
+    newer = get_product_state()
+    newer.prompt = "second"
+    save_product_state(newer)
+
+    stale.message = "exported"
+    update_product_state_fields(stale, "message")
+
+    state = get_product_state()
+    assert (state.prompt, state.message) == ("second", "exported")
@@ -84,7 +84,7 @@ function ProductAIChatPanel({
     setIsMounted(true);
   }, []);
 
-  // Track elapsed time during generation - use backend's generation_started_at if available
+  // Track elapsed time during generation - use backend's generation_started_at_ms if available
   useEffect(() => {
     if (!isEditInProgress) {
       setElapsedTime(0);
@@ -92,9 +92,7 @@ function ProductAIChatPanel({
     }
 
     // Use backend start time if available, otherwise use current time
-    const startTime = productState?.generation_started_at 
-      ? new Date(productState.generation_started_at).getTime()
-      : Date.now();
+    const startTime = productState?.generation_started_at_ms ?? Date.now();
     
     // Set initial elapsed time immediately
     setElapsedTime(Math.floor((Date.now() - startTime) / 1000));
@@ -104,7 +102,7 @@ function ProductAIChatPanel({
     }, 1000);
 
     return () => clearInterval(interval);
-  }, [isEditInProgress, productState?.generation_started_at]);
+  }, [isEditInProgress, productState?.generation_started_at_ms]);
 
   // Poll backend status while edit is running
   useEffect(() => {
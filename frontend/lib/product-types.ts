@@ -25,7 +25,7 @@ export interface ProductState {
   status: string;
   message?: string;
   in_progress: boolean;
-  generation_started_at?: string;
+  generation_started_at_ms?: number; // Unix epoch ms
   image_count: number;
   images: string[];
   trellis_output?: TrellisArtifacts;